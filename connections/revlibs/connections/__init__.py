@@ -1 +1,5 @@
-from revlibs.connections.interface import get, get_connector
+from revlibs.connections.interface import get, get_async, get_connector, pool, close_pools
+from revlibs.connections.pooling import ConnectionPool
+from revlibs.connections.flavours import register_flavour
+from revlibs.connections.aio import AsyncConnection
+from revlibs.connections.bulk import BulkLoadResult
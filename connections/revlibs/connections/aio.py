@@ -0,0 +1,194 @@
+"""Asyncio connections.
+
+Postgres connections use psycopg2's asynchronous mode, waiting for the socket
+in the event loop instead of blocking a thread. Flavours without a
+non-blocking mode, such as exasol, run their blocking calls in the loop's
+default executor.
+"""
+import asyncio
+import logging
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from revlibs.connections.racing import DEFAULT_STAGGER
+
+log = logging.getLogger(__name__)
+
+# The states of psycopg2's connection.poll(), from psycopg2.extensions
+_POLL_OK, _POLL_READ, _POLL_WRITE = 0, 1, 2
+
+
+async def wait_ready(connection) -> None:
+    """Wait for the pending operation of an asynchronous psycopg2 connection to complete"""
+    loop = asyncio.get_event_loop()
+    while True:
+        state = connection.poll()
+        if state == _POLL_OK:
+            return
+
+        ready = loop.create_future()
+
+        def wake() -> None:
+            if not ready.done():
+                ready.set_result(None)
+
+        fileno = connection.fileno()
+        if state == _POLL_READ:
+            loop.add_reader(fileno, wake)
+            remove = loop.remove_reader
+        elif state == _POLL_WRITE:
+            loop.add_writer(fileno, wake)
+            remove = loop.remove_writer
+        else:
+            raise ValueError(f"Unexpected poll state {state}")
+
+        try:
+            await ready
+        finally:
+            remove(fileno)
+
+
+class AsyncConnection:
+    """A blocking connection, whose calls run in the event loop's default executor.
+
+    Example::
+        async with get_async("exasol_db") as connection:
+            rows = await connection.fetch("SELECT * FROM table1;")
+    """
+
+    def __init__(self, connection) -> None:
+        self.connection = connection
+        # A connection runs one statement at a time
+        self._lock = asyncio.Lock()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.connection!r})"
+
+    async def _run(self, f: Callable, *args) -> Any:
+        return await asyncio.get_event_loop().run_in_executor(None, partial(f, *args))
+
+    async def execute(self, sql: str, params: Optional[Any] = None) -> Any:
+        """Execute a statement, returning the driver's statement or cursor"""
+        async with self._lock:
+            return await self._run(self.connection.execute, sql, params)
+
+    async def fetch(self, sql: str, params: Optional[Any] = None) -> List[Any]:
+        """Execute a query and return all of its rows"""
+        async with self._lock:
+            statement = await self._run(self.connection.execute, sql, params)
+            return await self._run(statement.fetchall)
+
+    async def close(self) -> None:
+        await self._run(self.connection.close)
+
+
+class AsyncPostgresConnection(AsyncConnection):
+    """An asynchronous psycopg2 connection, which is always in autocommit mode"""
+
+    async def execute(self, sql: str, params: Optional[Any] = None) -> Any:
+        """Execute a statement, returning its cursor"""
+        async with self._lock:
+            return await self._execute(sql, params)
+
+    async def _execute(self, sql: str, params: Optional[Any]) -> Any:
+        cursor = self.connection.cursor()
+        cursor.execute(sql, params)
+        try:
+            await wait_ready(self.connection)
+        except asyncio.CancelledError:
+            cursor.close()
+            await self._abort()
+            raise
+        except BaseException:
+            cursor.close()
+            raise
+        return cursor
+
+    async def _abort(self) -> None:
+        """Cancel the running statement, so the connection can run the next one.
+
+        The connection is closed if the statement can't be cancelled.
+        """
+        try:
+            self.connection.cancel()
+        except Exception as exc:
+            log.warning(f"Closing a connection whose statement could not be cancelled: {exc}")
+            self.connection.close()
+            return
+
+        try:
+            await wait_ready(self.connection)
+        except asyncio.CancelledError:
+            self.connection.close()
+        except Exception as exc:
+            # The cancelled statement ends with an error, such as QueryCanceledError
+            log.debug(f"Cancelled a statement: {exc}")
+
+    async def fetch(self, sql: str, params: Optional[Any] = None) -> List[Any]:
+        async with self._lock:
+            cursor = await self._execute(sql, params)
+            try:
+                return cursor.fetchall() if cursor.description else []
+            finally:
+                cursor.close()
+
+    async def close(self) -> None:
+        self.connection.close()
+
+
+async def race_async(
+    connect: Callable[[str], Awaitable[Any]],
+    candidates: List[str],
+    stagger: float = DEFAULT_STAGGER,
+    close: Callable[[Any], None] = lambda connection: connection.close(),
+) -> Tuple[Optional[Any], Dict[str, Exception]]:
+    """Connect to the first candidate to answer, as racing.race does with threads.
+
+    Attempts still in flight once one succeeds are cancelled, and any
+    connection they made is closed.
+    """
+    loop = asyncio.get_event_loop()
+    remaining = iter(candidates)
+    attempts: Dict[asyncio.Future, str] = {}
+    pending = set()
+    failures: Dict[str, Exception] = {}
+
+    def start_next() -> bool:
+        candidate = next(remaining, None)
+        if candidate is None:
+            return False
+        attempt = asyncio.ensure_future(connect(candidate), loop=loop)
+        attempts[attempt] = candidate
+        pending.add(attempt)
+        return True
+
+    more = start_next()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(
+                pending, timeout=stagger if more else None, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                more = start_next()
+                continue
+
+            pending.difference_update(done)
+            winners = [attempt for attempt in done if attempt.exception() is None]
+            if winners:
+                for late in winners[1:]:
+                    close(late.result())
+                return winners[0].result(), failures
+
+            for attempt in done:
+                log.debug(f"Could not connect to {attempts[attempt]}: {attempt.exception()}")
+                failures[attempts[attempt]] = attempt.exception()
+                more = start_next()
+        return None, failures
+    finally:
+        for attempt in pending:
+            attempt.cancel()
+        if pending:
+            results = await asyncio.gather(*pending, return_exceptions=True)
+            for result in results:
+                if not isinstance(result, BaseException):
+                    close(result)
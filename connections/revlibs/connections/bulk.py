@@ -0,0 +1,117 @@
+"""Helpers of bulk loads, streaming rows to the database's bulk protocol"""
+import io
+from itertools import chain, islice
+from typing import Any, Iterable, Iterator, Mapping, NamedTuple, Optional, Sequence
+
+# Rows sent by each COPY or IMPORT statement of a bulk load, by default
+DEFAULT_BULK_BATCH_SIZE = 100000
+
+
+class BulkLoadResult(NamedTuple):
+    """How a bulk load went"""
+
+    table: str
+    rows: int
+    batches: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def batches(rows: Iterable[Any], batch_size: Optional[int]) -> Iterator[Iterator[Any]]:
+    """Split rows into iterators of up to batch_size rows, all of them if batch_size is None.
+
+    The batches share the rows' iterator, so each must be consumed before the next.
+    """
+    if batch_size is not None and batch_size < 1:
+        raise ValueError(f"Expected a batch_size of at least 1, got {batch_size}")
+    rows = iter(rows)
+    for first in rows:
+        yield chain([first], rows if batch_size is None else islice(rows, batch_size - 1))
+
+
+class Counted:
+    """An iterator counting the items taken from it"""
+
+    def __init__(self, items: Iterable[Any]) -> None:
+        self.items = iter(items)
+        self.count = 0
+
+    def __iter__(self) -> "Counted":
+        return self
+
+    def __next__(self) -> Any:
+        item = next(self.items)
+        self.count += 1
+        return item
+
+
+def row_values(row: Any, columns: Optional[Sequence[str]]) -> Sequence[Any]:
+    """The values of a row given as a sequence, or as a mapping of the columns"""
+    if isinstance(row, Mapping):
+        if not columns:
+            raise ValueError("Columns are needed to load rows given as mappings")
+        return [row.get(column) for column in columns]
+    return row
+
+
+# Characters which need a CSV field to be quoted
+_SPECIAL = frozenset(',"\r\n')
+
+
+def csv_field(value: Any) -> str:
+    """A value as a CSV field, None as an unquoted empty field, which COPY reads as NULL.
+
+    Empty strings are quoted so they stay strings, as is the end of data marker.
+    """
+    if value is None:
+        return ""
+    text = str(value)
+    if not text or text == "\\." or not _SPECIAL.isdisjoint(text):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+class CsvStream(io.RawIOBase):
+    """A readable file of rows as CSV, encoded as they are read.
+
+    Only the rows needed to answer a read are encoded, so a generator of rows
+    is never held in memory. None is written as NULL, and empty strings as
+    quoted empty fields.
+    """
+
+    def __init__(self, rows: Iterable[Sequence[Any]], encoding: str = "utf-8") -> None:
+        super().__init__()
+        self.rows = Counted(rows)
+        self.encoding = encoding
+        self._buffer = b""
+
+    @property
+    def count(self) -> int:
+        """The rows encoded so far"""
+        return self.rows.count
+
+    def readable(self) -> bool:
+        return True
+
+    def _fill(self, size: int) -> None:
+        while size < 0 or len(self._buffer) < size:
+            row = next(self.rows, None)
+            if row is None:
+                return
+            line = ",".join(map(csv_field, row)) + "\n"
+            self._buffer += line.encode(self.encoding)
+
+    def read(self, size: int = -1) -> bytes:
+        self._fill(size)
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[: len(data)] = data
+        return len(data)
@@ -1,6 +1,8 @@
 """ Handles the connection config."""
 import os
 import logging
+import threading
+import time
 from pathlib import Path
 
 from revlibs.dicts import Dicts
@@ -8,6 +10,8 @@ from revlibs.dicts import Dicts
 
 _DEFAULT_DIRECTORY = Path.home() / ".revconnect/"
 _ENV_VAR_FOR_FILE = "REVLIB_CONNECTIONS"
+# Seconds between checks of the connection files for changes
+DEFAULT_CHECK_INTERVAL = 1.0
 _PASSWORD_REQUIRED = (
     # Provide a meaningful message
     "Please ensure you have set the password as an environment variable"
@@ -16,23 +20,104 @@ _PASSWORD_REQUIRED = (
 
 def load(database):
     """ Load the database connection configuration."""
-    loader = load_connection_settings()
-    candidates = [
-        item
-        for item in loader.items
-        if database == item["name"] and item.get("disabled", False) is not True
-    ]
-
-    if len(candidates) == 1:
-        db_config, *_ = candidates
-    elif len(candidates) > 1:
-        logging.error("Duplicate connection name '%s'.", database)
-        raise KeyError(f"Duplicates for '{database}' found.")
-    else:
-        logging.error(f"No config for db called: '%s'.", database)
-        raise KeyError(f"Connection settings for '{database}' not found.")
-
-    return Config(database, db_config)
+    return Config(database, registry().get(database))
+
+
+class ConnectionRegistry:
+    """ The connection settings of a directory, parsed once and indexed by name.
+
+    The files are checked for changes, by their mtime, size and inode, at most
+    every `check_interval` seconds, and only changed files are parsed again.
+    Duplicate names raise a KeyError when the settings are loaded.
+    """
+
+    def __init__(self, directory, check_interval=DEFAULT_CHECK_INTERVAL):
+        self.directory = Path(directory)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._loader = None
+        self._by_name = {}
+        self._checked = 0.0
+
+    def __repr__(self):
+        return f"ConnectionRegistry({self.directory.as_posix()!r})"
+
+    @staticmethod
+    def _index(items):
+        """ Index the enabled connections by name, failing on duplicates."""
+        by_name = {}
+        for item in items:
+            name = item.get("name")
+            if name is None or item.get("disabled", False) is True:
+                continue
+            if name in by_name:
+                logging.error("Duplicate connection name '%s'.", name)
+                raise KeyError(f"Duplicates for '{name}' found.")
+            by_name[name] = item
+        return by_name
+
+    def _update(self):
+        """ Load the settings, or reload the files changed since."""
+        now = time.monotonic()
+        if self._loader is not None and now - self._checked < self.check_interval:
+            return
+
+        try:
+            if self._loader is None:
+                self._loader = Dicts.from_path(self.directory)
+            elif not self._loader.refresh():
+                self._checked = now
+                return
+            self._by_name = self._index(self._loader.items)
+        except Exception:
+            # Start over on the next lookup, rather than serve broken settings
+            self._loader = None
+            raise
+        self._checked = now
+
+    def reload(self):
+        """ Parse all files again on the next lookup."""
+        with self._lock:
+            self._loader = None
+
+    def get(self, database):
+        """ The settings of a connection, raising KeyError if there are none."""
+        with self._lock:
+            self._update()
+            db_config = self._by_name.get(database)
+
+        if db_config is None:
+            logging.error("No config for db called: '%s'.", database)
+            raise KeyError(f"Connection settings for '{database}' not found.")
+        return db_config
+
+    def names(self):
+        """ The names of all enabled connections."""
+        with self._lock:
+            self._update()
+            return list(self._by_name)
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def registry(directory=None):
+    """ The process-wide registry of a directory, by default that of `load_connection_settings`."""
+    directory = Path(directory or os.environ.get(_ENV_VAR_FOR_FILE, _DEFAULT_DIRECTORY))
+    key = directory.resolve().as_posix()
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = ConnectionRegistry(directory)
+        return _registries[key]
+
+
+def reload():
+    """ Parse the connection settings again on their next lookup."""
+    with _registries_lock:
+        registries = list(_registries.values())
+    for connections in registries:
+        connections.reload()
 
 
 class Config:
@@ -1,16 +1,72 @@
 """Connectors classes"""
+import asyncio
+import re
+import time
+import uuid
 from abc import ABC, abstractmethod
-from typing import Generator
-
-import psycopg2
-import pyexasol
+from functools import partial
+from typing import TYPE_CHECKING, Any, Generator, Iterable, Iterator, List, Optional, Sequence
 
+from revlibs.connections.aio import AsyncConnection, AsyncPostgresConnection, race_async, wait_ready
+from revlibs.connections.bulk import (
+    DEFAULT_BULK_BATCH_SIZE,
+    BulkLoadResult,
+    Counted,
+    CsvStream,
+    batches,
+    row_values,
+)
 from revlibs.connections.config import Config
 from revlibs.connections.exceptions import ConnectionEstablishError, ConnectionParamsError
+from revlibs.connections.health import tracker
+from revlibs.connections.racing import DEFAULT_STAGGER, race
+
+# Drivers are imported when a connection is made, so only those used are imported
+if TYPE_CHECKING:
+    import psycopg2
+    import pyexasol
+
+# Rows fetched at a time by stream, by default
+DEFAULT_BATCH_SIZE = 10000
+
+# A range of hosts such as 127.0.0.1..3, the last number being the range
+_HOST_RANGE = re.compile(r"^(.*?)(\d+)\.\.(\d+)(.*)$")
+
+
+def expand_dsn(data_source_name: str) -> List[str]:
+    """Split a DSN into its "host:port" entries, expanding host ranges.
+
+    >>> expand_dsn('127.0.0.1..3:8888, localhost:5432')
+    ['127.0.0.1:8888', '127.0.0.2:8888', '127.0.0.3:8888', 'localhost:5432']
+    """
+    hosts = []
+    for dsn in data_source_name.split(","):
+        host, port = dsn.strip().rsplit(":", 1)
+        match = _HOST_RANGE.match(host)
+        if not match:
+            hosts.append(f"{host}:{port}")
+            continue
+        prefix, first, last, suffix = match.groups()
+        for number in range(int(first), int(last) + 1):
+            hosts.append(f"{prefix}{str(number).zfill(len(first))}{suffix}:{port}")
+    return hosts
+
+
+def _flag(value: Any) -> bool:
+    """A boolean config value, which may be a string when it comes from the environment"""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
 
 
 class BaseConnector(ABC):
-    """Base class for connectors"""
+    """Base class for connectors
+
+    `driver` names the module a connector needs, which is imported when a
+    connection is made rather than with this module.
+    """
+
+    driver = ""
 
     def __init__(self, cfg: Config) -> None:
         self.config = cfg
@@ -28,6 +84,17 @@ class BaseConnector(ABC):
         """Check if connection with database closed already"""
         pass
 
+    @staticmethod
+    def _reset(connection) -> None:
+        """Roll back anything left uncommitted, before a pooled connection is reused"""
+        connection.rollback()
+
+    @classmethod
+    async def _connect_async(cls, config: Config) -> AsyncConnection:
+        """Establish connection without blocking the event loop, in the loop's executor"""
+        loop = asyncio.get_event_loop()
+        return AsyncConnection(await loop.run_in_executor(None, cls._connect, config))
+
     def is_connected(self) -> bool:
         """Check if connection with database established and not closed"""
         return bool(self.connection and not self._is_connection_closed(self.connection))
@@ -39,6 +106,67 @@ class BaseConnector(ABC):
         self.connection = self._connect(self.config)
         return self.connection
 
+    def _cursor(self, connection, batch_size: int):
+        """A cursor to stream a query's rows through"""
+        return connection.cursor()
+
+    def stream(
+        self, sql: str, params: Optional[Any] = None, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Iterator[List[Any]]:
+        """Yield the rows of a query in lists of up to batch_size rows.
+
+        Rows are fetched as the batches are consumed, so only about a batch
+        is held in memory at a time. The cursor is closed when the iteration
+        ends, or when the generator is closed.
+
+        Example::
+            for rows in connector.stream("SELECT * FROM table1;", batch_size=1000):
+                process(rows)
+        """
+        cursor = self._cursor(self.get_connection(), batch_size)
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cursor.close()
+
+    def _bulk_load_batch(
+        self, connection, table: str, rows: Iterator[Sequence[Any]], columns: Optional[List[str]]
+    ) -> int:
+        """Load rows with the database's bulk protocol, returning how many were loaded"""
+        raise NotImplementedError(f"{type(self).__name__} does not support bulk loads")
+
+    def bulk_load(
+        self,
+        table: str,
+        rows: Iterable[Any],
+        columns: Optional[List[str]] = None,
+        batch_size: Optional[int] = DEFAULT_BULK_BATCH_SIZE,
+    ) -> BulkLoadResult:
+        """Load rows into a table with the database's bulk protocol.
+
+        Rows are sequences in the order of the columns, or mappings of the
+        columns, and may come from a generator: they are encoded as they are
+        sent, one statement per batch_size rows, or a single statement if
+        batch_size is None. Columns default to all those of the table.
+
+        Example::
+            result = connector.bulk_load("schema.table1", rows, columns=["id", "name"])
+            connector.get_connection().commit()
+            print(f"{result.rows} rows at {result.rows_per_second:.0f} rows/s")
+        """
+        connection = self.get_connection()
+        start = time.monotonic()
+        loaded = n_batches = 0
+        for batch in batches((row_values(row, columns) for row in rows), batch_size):
+            loaded += self._bulk_load_batch(connection, table, batch, columns)
+            n_batches += 1
+        return BulkLoadResult(table, loaded, n_batches, time.monotonic() - start)
+
     def close(self) -> None:
         """Close connection to database"""
         if not self.connection:
@@ -50,15 +178,19 @@ class BaseConnector(ABC):
 class ExasolConnector(BaseConnector):
     """Connector class for Exasol DB"""
 
+    driver = "pyexasol"
+
     @staticmethod
-    def _is_connection_closed(connection: pyexasol.ExaConnection) -> bool:
+    def _is_connection_closed(connection: "pyexasol.ExaConnection") -> bool:
         """Check if connection with database closed already"""
         return connection.is_closed
 
     @staticmethod
-    def _connect(config: Config) -> pyexasol.ExaConnection:
+    def _connect(config: Config) -> "pyexasol.ExaConnection":
         """Establish connection with exasol"""
-        params = {"compression": True}
+        import pyexasol
+
+        params = {"compression": True, "fetch_dict": True}
         if "schema" in config:
             params["schema"] = config.schema
         params.update(config.params)
@@ -68,7 +200,6 @@ class ExasolConnector(BaseConnector):
                 dsn=config.dsn,
                 user=config.user,
                 password=config.password,
-                fetch_dict=True,
                 fetch_mapper=pyexasol.exasol_mapper,
                 **params,
             )
@@ -85,48 +216,202 @@ class ExasolConnector(BaseConnector):
         except pyexasol.exceptions.ExaError as exc:
             raise ConnectionEstablishError(config.name, dsn=config.dsn) from exc
 
+    def stream(
+        self, sql: str, params: Optional[Any] = None, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Iterator[List[Any]]:
+        """Yield the rows of a query in lists of up to batch_size rows.
+
+        pyexasol fetches result sets in chunks as they are read, so only
+        about a batch is held in memory at a time. Rows are dicts unless the
+        config's params set `fetch_dict: false`.
+        """
+        statement = self.get_connection().execute(sql, params)
+        try:
+            while True:
+                rows = statement.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            statement.close()
+
+    def _bulk_load_batch(
+        self,
+        connection: "pyexasol.ExaConnection",
+        table: str,
+        rows: Iterator[Sequence[Any]],
+        columns: Optional[List[str]],
+    ) -> int:
+        """IMPORT rows, which pyexasol encodes as CSV while it sends them"""
+        rows = Counted(rows)
+        import_params = {"columns": columns} if columns else None
+        connection.import_from_iterable(rows, tuple(table.split(".")), import_params)
+        return rows.count
+
 
 class PostgresConnector(BaseConnector):
     """Connector class for PostgreSQL DB"""
 
+    driver = "psycopg2"
+
     @staticmethod
-    def _is_connection_closed(connection: psycopg2.extensions.connection) -> bool:
+    def _is_connection_closed(connection: "psycopg2.extensions.connection") -> bool:
         """Check if connection with database closed already"""
         return connection.closed
 
+    def _cursor(self, connection: "psycopg2.extensions.connection", batch_size: int):
+        """A named cursor, so rows are kept on the server until fetched.
+
+        Named cursors live in a transaction, or are declared WITH HOLD when
+        the connection is in autocommit mode.
+        """
+        cursor = connection.cursor(
+            name=f"revlibs_stream_{uuid.uuid4().hex}", withhold=connection.autocommit
+        )
+        cursor.itersize = batch_size
+        return cursor
+
     @staticmethod
     def _parse_dsn(data_source_name: str) -> Generator[str, None, None]:
         """Convert connection URI to key/value connection string.
 
-        >>> list(PostgresConnector._parse_dsn('localhost:8888, 127.0.0.1:6543'))
-        ['host=localhost port=8888', 'host=127.0.0.1 port=6543']
+        >>> list(PostgresConnector._parse_dsn('localhost:8888, 127.0.0.1..2:6543'))
+        ['host=localhost port=8888', 'host=127.0.0.1 port=6543', 'host=127.0.0.2 port=6543']
+        """
+        for dsn in expand_dsn(data_source_name):
+            yield PostgresConnector._host_dsn(dsn)
+
+    @staticmethod
+    def _host_dsn(host_port: str) -> str:
+        host, port = host_port.rsplit(":", 1)
+        return f"host={host} port={port}"
+
+    @staticmethod
+    def _connect(config: Config) -> "psycopg2.extensions.connection":
+        """Establish connection with postgres.
+
+        Hosts are tried healthiest first, as recorded by the process' health
+        tracker, or concurrently if the config sets `race`, starting an attempt
+        every `race_stagger` seconds.
         """
-        dsns = data_source_name.split(",")
-        for dsn in dsns:
-            host, port = dsn.strip().split(":")
-            yield f"host={host} port={port}"
+        import psycopg2
+
+        dbname = config.dbname if "dbname" in config else None
+        connect_dsn = partial(
+            psycopg2.connect,
+            user=config.user,
+            password=config.password,
+            dbname=dbname,
+            **config.params,
+        )
+        health = tracker()
+
+        def connect(host: str) -> "psycopg2.extensions.connection":
+            health.record_attempt(host)
+            start = time.monotonic()
+            try:
+                connection = connect_dsn(PostgresConnector._host_dsn(host))
+            except psycopg2.Error:
+                health.record_failure(host)
+                raise
+            health.record_success(host, time.monotonic() - start)
+            return connection
+
+        hosts = health.order(expand_dsn(config.dsn))
+
+        if _flag(config.race if "race" in config else False):
+            connection, failures = race(connect, hosts, PostgresConnector._stagger(config))
+            if connection is None:
+                raise PostgresConnector._race_error(config, failures)
+            return connection
+
+        last_exception = None
+        for host in hosts:
+            try:
+                return connect(host)
+            except psycopg2.Error as exc:
+                last_exception = exc
+
+        raise ConnectionEstablishError(
+            config.name, dsn=config.dsn, user=config.user, dbname=dbname,
+        ) from last_exception
+
+    @staticmethod
+    def _stagger(config: Config) -> float:
+        return float(config.race_stagger) if "race_stagger" in config else DEFAULT_STAGGER
 
     @staticmethod
-    def _connect(config: Config) -> psycopg2.extensions.connection:
-        """Establish connection with postgres"""
+    def _race_error(config: Config, failures: dict) -> ConnectionEstablishError:
+        """The error for a race every host lost, chained to the last failure"""
+        dbname = config.dbname if "dbname" in config else None
+        reason = "; ".join(f"{host}: {str(exc).strip()}" for host, exc in failures.items())
+        error = ConnectionEstablishError(
+            config.name, reason=reason, dsn=config.dsn, user=config.user, dbname=dbname,
+        )
+        error.__cause__ = list(failures.values())[-1] if failures else None
+        return error
+
+    @classmethod
+    async def _connect_async(cls, config: Config) -> AsyncPostgresConnection:
+        """Establish connection with postgres in psycopg2's asynchronous mode.
+
+        Hosts are raced healthiest first, starting an attempt every
+        `race_stagger` seconds, while the event loop waits on their sockets.
+        """
+        import psycopg2
+
         dbname = config.dbname if "dbname" in config else None
+        health = tracker()
 
-        connection, last_exception = None, None
-        for dsn in PostgresConnector._parse_dsn(config.dsn):
+        async def connect(host: str) -> "psycopg2.extensions.connection":
+            health.record_attempt(host)
+            start = time.monotonic()
+            connection = None
             try:
                 connection = psycopg2.connect(
-                    dsn,
+                    cls._host_dsn(host),
                     user=config.user,
                     password=config.password,
                     dbname=dbname,
+                    async_=True,
                     **config.params,
                 )
-            except psycopg2.Error as exc:
-                last_exception = exc
+                await wait_ready(connection)
+            except psycopg2.Error:
+                health.record_failure(host)
+                if connection is not None:
+                    connection.close()
+                raise
+            except asyncio.CancelledError:
+                if connection is not None:
+                    connection.close()
+                raise
+            health.record_success(host, time.monotonic() - start)
+            return connection
 
-        if not connection:
-            raise ConnectionEstablishError(
-                config.name, dsn=config.dsn, user=config.user, dbname=dbname,
-            ) from last_exception
+        hosts = health.order(expand_dsn(config.dsn))
+        connection, failures = await race_async(connect, hosts, cls._stagger(config))
+        if connection is None:
+            raise cls._race_error(config, failures)
+        return AsyncPostgresConnection(connection)
+
+    def _bulk_load_batch(
+        self,
+        connection: "psycopg2.extensions.connection",
+        table: str,
+        rows: Iterator[Sequence[Any]],
+        columns: Optional[List[str]],
+    ) -> int:
+        """COPY rows from a CSV stream, encoded as psycopg2 reads it"""
+        from psycopg2 import extensions, sql
 
-        return connection
+        statement = sql.SQL("COPY {} {}FROM STDIN WITH (FORMAT csv)").format(
+            sql.Identifier(*table.split(".")),
+            sql.SQL("({}) ").format(sql.SQL(", ").join(map(sql.Identifier, columns)))
+            if columns
+            else sql.SQL(""),
+        )
+        stream = CsvStream(rows, encoding=extensions.encodings.get(connection.encoding, "utf-8"))
+        with connection.cursor() as cursor:
+            cursor.copy_expert(statement, stream)
+        return stream.count
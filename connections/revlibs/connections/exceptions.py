@@ -21,3 +21,7 @@ class ConnectionParamsError(DatabaseConnectionError):
 
 class ConnectionEstablishError(DatabaseConnectionError):
     """Raised when connection to database cannot be established"""
+
+
+class PoolTimeoutError(DatabaseConnectionError):
+    """Raised when no pooled connection becomes available in time"""
@@ -0,0 +1,104 @@
+"""Registry of database flavours, and the connector class of each.
+
+Connector classes, and the drivers they need, are only imported when their
+flavour is first used. Other packages can add flavours by registering them
+with `register_flavour`, or through an entry point in the
+"revlibs.connections.flavours" group, named after the flavour:
+
+    setup(
+        ...
+        entry_points={
+            "revlibs.connections.flavours": ["mydb = mypackage.connectors:MyDBConnector"],
+        },
+    )
+"""
+import importlib
+import logging
+import threading
+from typing import Dict, List, Type, Union
+
+from revlibs.connections.connectors import BaseConnector
+
+log = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "revlibs.connections.flavours"
+
+# A connector class, or the "module:attribute" path to import it from
+Connector = Union[Type[BaseConnector], str]
+
+_flavours: Dict[str, Connector] = {
+    "exasol": "revlibs.connections.connectors:ExasolConnector",
+    "postgres": "revlibs.connections.connectors:PostgresConnector",
+}
+_entry_points_loaded = False
+_lock = threading.Lock()
+
+
+def register_flavour(name: str, connector: Connector) -> None:
+    """Register a connector class, or its "module:attribute" path, for a flavour"""
+    with _lock:
+        _flavours[name] = connector
+
+
+def _entry_points() -> Dict[str, str]:
+    """The flavours registered by installed packages"""
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        import pkg_resources
+
+        return {
+            entry_point.name: f"{entry_point.module_name}:{'.'.join(entry_point.attrs)}"
+            for entry_point in pkg_resources.iter_entry_points(ENTRY_POINT_GROUP)
+        }
+
+    found = entry_points()
+    if hasattr(found, "select"):
+        group = found.select(group=ENTRY_POINT_GROUP)
+    else:
+        group = found.get(ENTRY_POINT_GROUP, [])
+    return {entry_point.name: entry_point.value for entry_point in group}
+
+
+def _load_entry_points() -> None:
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    for name, path in _entry_points().items():
+        # Flavours registered in code take precedence
+        _flavours.setdefault(name, path)
+
+
+def _import(path: str) -> Type[BaseConnector]:
+    module_name, _, attribute = path.partition(":")
+    connector = importlib.import_module(module_name)
+    for name in attribute.split("."):
+        connector = getattr(connector, name)
+    return connector
+
+
+def flavours() -> List[str]:
+    """The names of all registered flavours"""
+    with _lock:
+        _load_entry_points()
+        return sorted(_flavours)
+
+
+def get_flavour(name: str) -> Type[BaseConnector]:
+    """Return the connector class of a flavour, after importing its driver.
+
+    Raises:
+        KeyError: If the flavour is not registered
+        ImportError: If the connector or its driver cannot be imported
+    """
+    with _lock:
+        if name not in _flavours:
+            _load_entry_points()
+        connector = _flavours[name]
+        if isinstance(connector, str):
+            connector = _flavours[name] = _import(connector)
+
+    if connector.driver:
+        importlib.import_module(connector.driver)
+    return connector
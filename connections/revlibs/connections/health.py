@@ -0,0 +1,192 @@
+"""Health of database hosts, shared by the connectors of a process.
+
+Connect latencies and failures are recorded per host, and used to try the
+healthiest hosts first. A host failing `failure_threshold` times in a row
+has its circuit opened, and is only tried after every other host, until
+`reset_timeout` seconds have passed. It is then tried first once more
+(half-open), which closes the circuit on success and opens it again on
+failure. Once that probe is attempted, other connects try the host last for
+another `reset_timeout`.
+
+The state can be shared between processes through a small JSON file, named
+by the `REVLIB_CONNECTIONS_HEALTH` environment variable.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+log = logging.getLogger(__name__)
+
+_ENV_VAR_FOR_STATE_FILE = "REVLIB_CONNECTIONS_HEALTH"
+
+DEFAULT_FAILURE_THRESHOLD = 3
+# Seconds before a host with an open circuit is tried again
+DEFAULT_RESET_TIMEOUT = 30.0
+# Weight of the latest connect latency in the moving average
+DEFAULT_ALPHA = 0.3
+
+
+class HostHealth:
+    """Recent connect latency and failures of a host"""
+
+    __slots__ = ("latency", "failures", "opened_at")
+
+    def __init__(
+        self, latency: Optional[float] = None, failures: int = 0, opened_at: Optional[float] = None,
+    ) -> None:
+        # Exponentially weighted moving average of connect latency, in seconds
+        self.latency = latency
+        # Failures since the last success
+        self.failures = failures
+        # When the circuit was last opened or probed, in seconds since the epoch
+        self.opened_at = opened_at
+
+    def __repr__(self):
+        return (
+            f"HostHealth(latency={self.latency}, failures={self.failures}, "
+            f"opened_at={self.opened_at})"
+        )
+
+    def to_dict(self) -> Dict:
+        return {"latency": self.latency, "failures": self.failures, "opened_at": self.opened_at}
+
+
+class HealthTracker:
+    """Thread-safe record of host health, see the module documentation"""
+
+    def __init__(
+        self,
+        state_file: Optional[Path] = None,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        alpha: float = DEFAULT_ALPHA,
+    ) -> None:
+        self.state_file = Path(state_file) if state_file else None
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, HostHealth] = {}
+        self._state_mtime: Optional[int] = None
+
+    def __getitem__(self, host: str) -> HostHealth:
+        with self._lock:
+            self._read_state()
+            return self._hosts.setdefault(host, HostHealth())
+
+    def reset(self) -> None:
+        """Forget the health of every host"""
+        with self._lock:
+            self._hosts.clear()
+            self._write_state()
+
+    def _read_state(self) -> None:
+        """Load the state file if another process changed it"""
+        if self.state_file is None:
+            return
+        try:
+            mtime = self.state_file.stat().st_mtime_ns
+            if mtime == self._state_mtime:
+                return
+            state = json.loads(self.state_file.read_text())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            log.warning(f"Could not read host health from {self.state_file}: {exc}")
+            return
+
+        self._state_mtime = mtime
+        for host, health in state.items():
+            self._hosts[host] = HostHealth(**health)
+
+    def _write_state(self) -> None:
+        if self.state_file is None:
+            return
+        state = {host: health.to_dict() for host, health in self._hosts.items()}
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.state_file.parent, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp, self.state_file)
+            self._state_mtime = self.state_file.stat().st_mtime_ns
+        except OSError as exc:
+            log.warning(f"Could not write host health to {self.state_file}: {exc}")
+
+    def _probe_due(self, health: HostHealth, now: float) -> bool:
+        """If the circuit is open and the half-open probe can be attempted"""
+        return health.opened_at is not None and now - health.opened_at >= self.reset_timeout
+
+    def order(self, hosts: List[str]) -> List[str]:
+        """The hosts by health: a half-open probe due first, then fastest, untried, failing,
+        and open circuits last.
+
+        Hosts of equal health keep their given order.
+        """
+        now = time.time()
+        with self._lock:
+            self._read_state()
+
+            def rank(host: str):
+                health = self._hosts.get(host)
+                if health is None:
+                    return (1, 0, float("inf"))
+                if self._probe_due(health, now):
+                    return (0, 0, 0.0)
+                latency = float("inf") if health.latency is None else health.latency
+                return (2 if health.opened_at is not None else 1, health.failures, latency)
+
+            return sorted(hosts, key=rank)
+
+    def record_attempt(self, host: str) -> None:
+        """Claim the half-open probe of the host if due, keeping its circuit open for others"""
+        now = time.time()
+        with self._lock:
+            self._read_state()
+            health = self._hosts.get(host)
+            if health is not None and self._probe_due(health, now):
+                log.info(f"Probing {host}, whose circuit is open")
+                health.opened_at = now
+                self._write_state()
+
+    def record_success(self, host: str, latency: float) -> None:
+        with self._lock:
+            self._read_state()
+            health = self._hosts.setdefault(host, HostHealth())
+            if health.latency is None:
+                health.latency = latency
+            else:
+                health.latency = self.alpha * latency + (1 - self.alpha) * health.latency
+            if health.opened_at is not None:
+                log.info(f"Closing the circuit of {host}")
+            health.failures, health.opened_at = 0, None
+            self._write_state()
+
+    def record_failure(self, host: str) -> None:
+        with self._lock:
+            self._read_state()
+            health = self._hosts.setdefault(host, HostHealth())
+            health.failures += 1
+            if health.failures >= self.failure_threshold:
+                if health.opened_at is None:
+                    log.warning(f"Opening the circuit of {host} after {health.failures} failures")
+                health.opened_at = time.time()
+            self._write_state()
+
+
+_tracker: Optional[HealthTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def tracker() -> HealthTracker:
+    """The health tracker shared by the connectors of this process"""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = HealthTracker(os.environ.get(_ENV_VAR_FOR_STATE_FILE))
+        return _tracker
@@ -1,15 +1,18 @@
 """Standard connection interfaces"""
+import threading
 from contextlib import contextmanager
-from typing import Iterator, Union
-
-import psycopg2
-import pyexasol
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Union
 
 from revlibs.connections import config
-from revlibs.connections.connectors import BaseConnector, ExasolConnector, PostgresConnector
+from revlibs.connections.aio import AsyncConnection
+from revlibs.connections.connectors import BaseConnector
 from revlibs.connections.exceptions import ConnectionParamsError
+from revlibs.connections.flavours import get_flavour
+from revlibs.connections.pooling import ConnectionPool
 
-CONNECTORS = {"exasol": ExasolConnector, "postgres": PostgresConnector}
+if TYPE_CHECKING:
+    import psycopg2
+    import pyexasol
 
 
 def get_connector(name: str) -> BaseConnector:
@@ -48,21 +51,64 @@ def get_connector(name: str) -> BaseConnector:
         raise ConnectionParamsError(name, reason=exc.args[0])
 
     try:
-        connector_class = CONNECTORS[cfg.flavour]
+        connector_class = get_flavour(cfg.flavour)
     except KeyError:
         raise ConnectionParamsError(name, reason=f"unsupported database type {cfg.flavour}")
+    except ImportError as exc:
+        raise ConnectionParamsError(
+            name, reason=f"driver for {cfg.flavour} is not installed ({exc})"
+        ) from exc
 
     return connector_class(cfg)
 
 
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def pool(name: str, **kwargs) -> ConnectionPool:
+    """Return the process-wide pool of connections to a database, creating it on first use.
+
+    Keyword arguments are those of `ConnectionPool`: min_size, max_size,
+    max_idle, max_age and timeout. They only apply when the pool is created.
+
+    Example::
+        with pool("exasol_db", max_size=4).connection() as connection:
+            connection.execute("SELECT * FROM table1;")
+
+    Raises:
+        ConnectionParamsError: If connection params in config are invalid
+        ConnectionEstablishError: If the first min_size connections cannot be established
+    """
+    with _pools_lock:
+        existing = _pools.get(name)
+        if existing is None or existing.closed:
+            existing = _pools[name] = ConnectionPool(get_connector(name), **kwargs)
+        return existing
+
+
+def close_pools() -> None:
+    """Close every process-wide pool"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for connection_pool in pools:
+        connection_pool.close()
+
+
 @contextmanager
-def get(name: str) -> Iterator[Union[pyexasol.ExaConnection, psycopg2.extensions.connection]]:
+def get(
+    name: str, pooled: bool = False
+) -> Iterator[Union["pyexasol.ExaConnection", "psycopg2.extensions.connection"]]:
     """Context manager that open connection to database and close it after.
 
     Database connection parameters will be loaded from YAML/JSON config stored
     in `~/.revconnect/` directory or another path specified by environment
     variable `REVLIB_CONNECTIONS`
 
+    With `pooled=True` the connection is checked out of the database's
+    process-wide `pool`, and returned to it after, rolled back.
+
     Example::
         with get("exasol_db") as connection:  # open new connection
             connection.execute("SELECT * FROM table1;")
@@ -72,6 +118,49 @@ def get(name: str) -> Iterator[Union[pyexasol.ExaConnection, psycopg2.extensions
         ConnectionParamsError: If connection params in config are invalid
         ConnectionEstablishError: If connection cannot be established
     """
+    if pooled:
+        with pool(name).connection() as connection:
+            yield connection
+        return
+
     connector = get_connector(name)
     yield connector.get_connection()
     connector.close()
+
+
+class _AsyncConnect:
+    """Async context manager opening a connection, and closing it after"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.connection: Optional[AsyncConnection] = None
+
+    async def __aenter__(self) -> AsyncConnection:
+        connector = get_connector(self.name)
+        self.connection = await connector._connect_async(connector.config)
+        return self.connection
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.connection.close()
+        self.connection = None
+
+
+def get_async(name: str) -> _AsyncConnect:
+    """Async context manager that open connection to database and close it after.
+
+    Connection parameters are loaded as with `get`. Postgres connections are
+    made in psycopg2's asynchronous mode, racing the hosts of a multi-host
+    DSN, while other flavours run their blocking driver in the event loop's
+    default executor.
+
+    Example::
+        async with get_async("postgres_db") as connection:
+            await connection.execute("INSERT INTO table1 VALUES (%s);", (1,))
+            rows = await connection.fetch("SELECT * FROM table1;")
+        # connection will be closed here
+
+    Raises:
+        ConnectionParamsError: If connection params in config are invalid
+        ConnectionEstablishError: If connection cannot be established
+    """
+    return _AsyncConnect(name)
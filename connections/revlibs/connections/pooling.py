@@ -0,0 +1,231 @@
+"""Pools of connections, reused across checkouts"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from revlibs.connections.connectors import BaseConnector
+from revlibs.connections.exceptions import ConnectionEstablishError, PoolTimeoutError
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MIN_SIZE = 0
+DEFAULT_MAX_SIZE = 10
+# Seconds a connection can stay unused in the pool before it is closed
+DEFAULT_MAX_IDLE = 300.0
+# Seconds after which a connection is closed and replaced, when it is next returned or checked out
+DEFAULT_MAX_AGE = 3600.0
+# Seconds to wait for a connection when all max_size are checked out
+DEFAULT_TIMEOUT = 30.0
+
+
+class ConnectionPool:
+    """Thread-safe pool of up to max_size connections to one database.
+
+    Connections are rolled back when they are returned, and handed out most
+    recently used first, so that the least used ones reach max_idle and are
+    closed the next time the pool is used. At least min_size connections are
+    kept open.
+
+    Example::
+        pool = ConnectionPool(get_connector("exasol_db"), max_size=4)
+        with pool.connection() as connection:
+            connection.execute("SELECT * FROM table1;")
+        pool.close()
+    """
+
+    def __init__(
+        self,
+        connector: BaseConnector,
+        min_size: int = DEFAULT_MIN_SIZE,
+        max_size: int = DEFAULT_MAX_SIZE,
+        max_idle: float = DEFAULT_MAX_IDLE,
+        max_age: float = DEFAULT_MAX_AGE,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError("Expected 0 <= min_size <= max_size and max_size >= 1")
+
+        self.connector = connector
+        self.name = connector.config.name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.max_age = max_age
+        self.timeout = timeout
+
+        self._condition = threading.Condition()
+        # Idle connections with the time they were returned, most recent last
+        self._idle: Deque[Tuple[Any, float]] = deque()
+        # When each open connection was opened, by id
+        self._opened: Dict[int, float] = {}
+        # Checked out connections, by id
+        self._checked_out: Dict[int, Any] = {}
+        # Connections being opened outside of the lock
+        self._connecting = 0
+        self._closed = False
+
+        for _ in range(min_size):
+            self._idle.append((self._open(), time.monotonic()))
+
+    def __repr__(self):
+        return f"ConnectionPool({self.name!r}, size={self.size}, max_size={self.max_size})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def size(self) -> int:
+        """The number of open connections, idle or checked out"""
+        return len(self._opened) + self._connecting
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _open(self):
+        connection = self.connector._connect(self.connector.config)
+        self._opened[id(connection)] = time.monotonic()
+        return connection
+
+    def _discard(self, connection) -> None:
+        """Forget a connection, to be closed outside of the lock"""
+        self._opened.pop(id(connection), None)
+        self._condition.notify()
+
+    def _close(self, connections: List[Any]) -> None:
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception as exc:
+                log.warning(f"Could not close a connection to {self.name}: {exc}")
+
+    def _sweep(self, now: float) -> List[Any]:
+        """Forget idle connections past max_age, or past max_idle beyond min_size, oldest first"""
+        expired = []
+        for connection, returned in list(self._idle):
+            too_old = now - self._opened.get(id(connection), now) >= self.max_age
+            if too_old or (now - returned >= self.max_idle and self.size > self.min_size):
+                self._idle.remove((connection, returned))
+                self._discard(connection)
+                expired.append(connection)
+        return expired
+
+    def _usable(self, connection, returned: float, now: float) -> bool:
+        if now - self._opened.get(id(connection), now) >= self.max_age:
+            return False
+        if now - returned >= self.max_idle and self.size > self.min_size:
+            return False
+        return not self.connector._is_connection_closed(connection)
+
+    def acquire(self, timeout: Optional[float] = None):
+        """Check out a connection, waiting up to timeout seconds for one to be returned.
+
+        Raises:
+            PoolTimeoutError: If no connection became available in time
+            ConnectionEstablishError: If the pool is closed, or a new connection fails
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        stale = []
+        try:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise ConnectionEstablishError(self.name, reason="Pool is closed")
+
+                    now = time.monotonic()
+                    stale.extend(self._sweep(now))
+                    while self._idle:
+                        connection, returned = self._idle.pop()
+                        if self._usable(connection, returned, now):
+                            self._checked_out[id(connection)] = connection
+                            return connection
+                        self._discard(connection)
+                        stale.append(connection)
+
+                    if self.size < self.max_size:
+                        self._connecting += 1
+                        break
+
+                    remaining = deadline - now
+                    if remaining <= 0 or not self._condition.wait(remaining):
+                        raise PoolTimeoutError(
+                            self.name,
+                            reason=f"No pooled connection available after {timeout}s",
+                            max_size=self.max_size,
+                        )
+        finally:
+            self._close(stale)
+
+        connection = None
+        try:
+            connection = self._open()
+            return connection
+        finally:
+            with self._condition:
+                self._connecting -= 1
+                if connection is not None:
+                    self._checked_out[id(connection)] = connection
+                self._condition.notify()
+
+    def release(self, connection) -> None:
+        """Return a checked out connection, rolling back anything uncommitted.
+
+        Raises:
+            ValueError: If the connection isn't checked out of this pool, such as
+                        when it was already returned
+        """
+        with self._condition:
+            if self._checked_out.pop(id(connection), None) is not connection:
+                raise ValueError(f"Connection is not checked out of the pool of {self.name}")
+
+        reusable = not self._closed and not self.connector._is_connection_closed(connection)
+        if reusable:
+            try:
+                self.connector._reset(connection)
+            except Exception as exc:
+                log.warning(f"Closing a connection to {self.name} which failed to reset: {exc}")
+                reusable = False
+
+        with self._condition:
+            now = time.monotonic()
+            opened = self._opened.get(id(connection), now)
+            if reusable and not self._closed and now - opened < self.max_age:
+                self._idle.append((connection, now))
+                self._condition.notify()
+                expired = self._sweep(now)
+            else:
+                self._discard(connection)
+                expired = [connection]
+        self._close(expired)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """Context manager checking out a connection, and returning it after"""
+        connection = self.acquire(timeout)
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close(self) -> None:
+        """Close the idle connections, and the checked out ones once they are returned"""
+        with self._condition:
+            self._closed = True
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+            for connection in idle:
+                self._discard(connection)
+            self._condition.notify_all()
+        self._close(idle)
+
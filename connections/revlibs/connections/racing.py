@@ -0,0 +1,86 @@
+"""Racing connection attempts to several hosts ("happy eyeballs")"""
+import logging
+import queue
+import threading
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+log = logging.getLogger(__name__)
+
+# Seconds to wait for an attempt before starting the next, as recommended by RFC 8305
+DEFAULT_STAGGER = 0.25
+
+Connection = TypeVar("Connection")
+
+
+def race(
+    connect: Callable[[str], Connection],
+    candidates: List[str],
+    stagger: float = DEFAULT_STAGGER,
+    close: Callable[[Connection], None] = lambda connection: connection.close(),
+) -> Tuple[Optional[Connection], Dict[str, Exception]]:
+    """Connect to the first candidate to answer, starting an attempt every `stagger` seconds.
+
+    The next attempt starts early when one fails. Once one succeeds, no more
+    attempts are started, and connections made by attempts still in flight
+    are closed as they complete.
+
+    Returns:
+        The first connection, or None if every attempt failed,
+        and the errors of the attempts which failed before it
+    """
+    results: queue.Queue = queue.Queue()
+    lock = threading.Lock()
+    won = False
+
+    def attempt(candidate: str) -> None:
+        try:
+            connection = connect(candidate)
+        except Exception as exc:
+            results.put((candidate, None, exc))
+            return
+        with lock:
+            if not won:
+                results.put((candidate, connection, None))
+                return
+        log.debug(f"Closing connection to {candidate}, which lost the race")
+        close(connection)
+
+    remaining = iter(candidates)
+    started = finished = 0
+
+    def start_next() -> bool:
+        nonlocal started
+        candidate = next(remaining, None)
+        if candidate is None:
+            return False
+        name = f"connect-{candidate}"
+        threading.Thread(target=attempt, args=(candidate,), name=name, daemon=True).start()
+        started += 1
+        return True
+
+    failures: Dict[str, Exception] = {}
+    more = start_next()
+    while finished < started:
+        try:
+            candidate, connection, exc = results.get(timeout=stagger if more else None)
+        except queue.Empty:
+            more = start_next()
+            continue
+
+        finished += 1
+        if connection is not None:
+            with lock:
+                won = True
+            # Attempts which succeeded before the race was won
+            while not results.empty():
+                _, late, _ = results.get_nowait()
+                if late is not None:
+                    close(late)
+            log.debug(f"Connected to {candidate} after {len(failures)} failures")
+            return connection, failures
+
+        log.debug(f"Could not connect to {candidate}: {exc}")
+        failures[candidate] = exc
+        more = start_next()
+
+    return None, failures
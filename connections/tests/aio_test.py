@@ -0,0 +1,250 @@
+""" Test the asyncio interface, against an in-process stand-in for postgres."""
+import asyncio
+import json
+import select
+import socket
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import psycopg2
+import pytest
+
+from revlibs.connections import get_async
+from revlibs.connections.aio import race_async
+from revlibs.connections.exceptions import ConnectionEstablishError
+
+
+TEST_CONNECTIONS = Path(__name__).parent / "resources" / "test_connections/"
+TEST_ENVIRONMENT = {
+    "REVLIB_CONNECTIONS": TEST_CONNECTIONS.as_posix(),
+    "TEST_PASS": "IamAwizard",
+}
+
+POLL_OK, POLL_READ = psycopg2.extensions.POLL_OK, psycopg2.extensions.POLL_READ
+
+
+class StandInServer:
+    """ Answers each host over a socket pair from a thread, after the host's delay.
+
+    Hosts without a delay refuse connections. Queries are answered with
+    their parameters as the only row, or an error if cancelled while running.
+    """
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.connections = []
+
+    def connect(self, dsn, async_=False, **kwargs):
+        assert async_
+        host = dsn.split()[0].split("=")[1]
+        client, server = socket.socketpair()
+        delay = self.delays.get(host)
+        threading.Thread(target=self.serve, args=(server, delay), daemon=True).start()
+        connection = StandInConnection(client, host)
+        self.connections.append(connection)
+        return connection
+
+    @staticmethod
+    def serve(server, delay):
+        with server:
+            if delay is None:
+                return
+            time.sleep(delay)
+            lines = server.makefile("rb", buffering=0)
+            try:
+                server.sendall(b"ready\n")
+                for line in lines:
+                    query = json.loads(line)
+                    if "cancel" in query:
+                        continue
+                    if select.select([server], [], [], query["sleep"])[0]:
+                        lines.readline()
+                        answer = {"error": "canceling statement due to user request"}
+                    else:
+                        answer = [query["params"]]
+                    server.sendall(json.dumps(answer).encode() + b"\n")
+            except OSError:
+                # The client hung up, having lost a race
+                pass
+
+
+class StandInConnection:
+    """ A psycopg2 asynchronous connection, polled without blocking."""
+
+    def __init__(self, sock, host):
+        sock.setblocking(False)
+        self.sock = sock
+        self.host = host
+        self.buffer = b""
+        self.rows = None
+        self.closed = 0
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def poll(self):
+        try:
+            data = self.sock.recv(4096)
+        except BlockingIOError:
+            return POLL_READ
+        if not data:
+            raise psycopg2.OperationalError(f"could not connect to {self.host}")
+        self.buffer += data
+        if not self.buffer.endswith(b"\n"):
+            return POLL_READ
+        answer, self.buffer = self.buffer, b""
+        if answer != b"ready\n":
+            answer = json.loads(answer)
+            if "error" in answer:
+                raise psycopg2.extensions.QueryCanceledError(answer["error"])
+            self.rows = [tuple(row) for row in answer]
+        return POLL_OK
+
+    def cancel(self):
+        self.sock.sendall(b'{"cancel": true}\n')
+
+    def cursor(self):
+        return StandInCursor(self)
+
+    def close(self):
+        self.sock.close()
+        self.closed = 1
+
+
+class StandInCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+
+    def execute(self, sql, params=None):
+        query = {"sql": sql, "params": params, "sleep": 0.2 if "pg_sleep" in sql else 0}
+        self.connection.sock.sendall(json.dumps(query).encode() + b"\n")
+        self.description = [("column",)]
+
+    def fetchall(self):
+        return self.connection.rows
+
+    def close(self):
+        pass
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+@patch.dict("os.environ", TEST_ENVIRONMENT)
+def test_async_postgres():
+    """ Queries go through the stand-in, while the event loop stays free."""
+    server = StandInServer({"127.0.0.1": 0})
+
+    async def query():
+        async with get_async("postgres_simple") as connection:
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticker = asyncio.ensure_future(tick())
+            rows = await connection.fetch("SELECT pg_sleep(0.2), %s;", [1])
+            ticker.cancel()
+            return rows, ticks
+
+    with patch("psycopg2.connect", side_effect=server.connect):
+        rows, ticks = run(query())
+
+    assert rows == [(1,)]
+    assert ticks > 5
+    assert server.connections[0].closed
+
+
+@patch.dict("os.environ", TEST_ENVIRONMENT)
+def test_async_postgres_cancel():
+    """ A cancelled query is cancelled on the server, freeing the connection."""
+    server = StandInServer({"127.0.0.1": 0})
+
+    async def query():
+        async with get_async("postgres_simple") as connection:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(connection.fetch("SELECT pg_sleep(0.2), %s;", [1]), 0.05)
+            return await connection.fetch("SELECT %s;", [2])
+
+    with patch("psycopg2.connect", side_effect=server.connect):
+        assert run(query()) == [(2,)]
+
+
+@patch.dict("os.environ", TEST_ENVIRONMENT)
+def test_async_postgres_races_hosts():
+    """ The fastest host wins, the others are closed."""
+    server = StandInServer({"127.0.0.1": 0.5, "127.0.0.3": 0})
+
+    async def query():
+        async with get_async("postgres_race") as connection:
+            return connection.connection.host, await connection.fetch("SELECT %s;", ["a"])
+
+    with patch("psycopg2.connect", side_effect=server.connect):
+        host, rows = run(query())
+
+    assert host == "127.0.0.3"
+    assert rows == [("a",)]
+    assert all(connection.closed for connection in server.connections)
+
+
+@patch.dict("os.environ", TEST_ENVIRONMENT)
+def test_async_postgres_failures():
+    """ Every host refusing raises a ConnectionEstablishError listing them."""
+    server = StandInServer({})
+
+    async def connect():
+        async with get_async("postgres_multi_server"):
+            pass
+
+    with patch("psycopg2.connect", side_effect=server.connect):
+        with pytest.raises(ConnectionEstablishError) as info:
+            run(connect())
+
+    assert str(info.value) == (
+        "Could not connect to postgres_multi_server: "
+        "127.0.0.1:5436: could not connect to 127.0.0.1; "
+        "127.0.0.2:5436: could not connect to 127.0.0.2 "
+        "[dsn=127.0.0.1:5436,127.0.0.2:5436 user=test dbname=None]"
+    )
+    assert isinstance(info.value.__cause__, psycopg2.OperationalError)
+
+
+def test_race_async_cancels_losers():
+    """ Attempts still running when one wins are cancelled."""
+    cancelled = []
+
+    async def connect(candidate):
+        try:
+            await asyncio.sleep({"a": 1, "b": 0.01, "c": 1}[candidate])
+        except asyncio.CancelledError:
+            cancelled.append(candidate)
+            raise
+        return candidate
+
+    winner, failures = run(race_async(connect, ["a", "b", "c"], 0))
+    assert winner == "b"
+    assert failures == {}
+    assert sorted(cancelled) == ["a", "c"]
+
+
+@patch.dict("os.environ", TEST_ENVIRONMENT)
+def test_async_exasol():
+    """ Exasol runs its blocking driver in the executor."""
+    with patch("pyexasol.connect") as mocked_conn:
+        mocked_conn.return_value.execute.return_value.fetchall.return_value = [{"a": 1}]
+
+        async def query():
+            async with get_async("exasol_multi_server") as connection:
+                return await connection.fetch("SELECT 1 AS a;")
+
+        assert run(query()) == [{"a": 1}]
+
+    mocked_conn.return_value.execute.assert_called_with("SELECT 1 AS a;", None)
+    mocked_conn.return_value.close.assert_called()
@@ -0,0 +1,44 @@
+""" Test bulk load helpers."""
+import itertools
+
+import pytest
+
+from revlibs.connections.bulk import BulkLoadResult, CsvStream, batches
+
+
+def test_csv_stream():
+    """ Rows are encoded as CSV as they are read."""
+    rows = iter([(1, "a,b", None), (2, 'say "hi"', 1.5), (3, "é", True)])
+    stream = CsvStream(rows)
+
+    assert stream.read(4) == b'1,"a'
+    assert stream.count == 1
+    assert stream.read() == b',b",\n2,"say ""hi""",1.5\n3,\xc3\xa9,True\n'
+    assert stream.count == 3
+    assert stream.read(10) == b""
+
+
+def test_csv_stream_nulls():
+    """ None is an unquoted empty field, read as NULL, and empty strings are quoted."""
+    assert CsvStream([(1, "", None), ("\\.",)]).read() == b'1,"",\n"\\."\n'
+
+
+def test_csv_stream_generator():
+    """ Only the rows needed for a read are taken from a generator."""
+    stream = CsvStream(([n] for n in itertools.count()))
+    assert stream.read(8192)
+    assert stream.count < 5000
+
+
+def test_batches():
+    """ Batches are taken lazily from a single iterator."""
+    assert [list(batch) for batch in batches(range(5), 2)] == [[0, 1], [2, 3], [4]]
+    assert [list(batch) for batch in batches(range(5), None)] == [[0, 1, 2, 3, 4]]
+    assert list(batches([], 2)) == []
+    with pytest.raises(ValueError):
+        list(batches(range(5), 0))
+
+
+def test_rows_per_second():
+    assert BulkLoadResult("t", 100, 1, 2.0).rows_per_second == 50
+    assert BulkLoadResult("t", 0, 0, 0.0).rows_per_second == 0
@@ -3,7 +3,8 @@ from unittest.mock import patch
 
 import pytest
 
-from revlibs.connections.config import Config
+from revlibs.connections import config
+from revlibs.connections.config import Config, ConnectionRegistry
 
 
 def test_raise_password():
@@ -18,3 +19,39 @@ def test_password_fetched():
     """ Test config grabs password from env."""
     config = Config("test", {"password": "_env:GET_ME"})
     assert config.password == "wizards"
+
+
+def test_registry(tmp_path):
+    """ Test the registry parses once, and reloads changed files."""
+    (tmp_path / "a.yaml").write_text("- name: a\n  flavour: postgres\n")
+    (tmp_path / "b.yaml").write_text("- name: b\n  flavour: exasol\n")
+    connections = ConnectionRegistry(tmp_path, check_interval=0)
+
+    assert connections.get("a")["flavour"] == "postgres"
+    assert connections.names() == ["a", "b"]
+    with pytest.raises(KeyError):
+        connections.get("c")
+
+    (tmp_path / "b.yaml").write_text("- name: b\n  flavour: postgres\n- name: c\n")
+    assert connections.get("b")["flavour"] == "postgres"
+    assert "flavour" not in connections.get("c")
+
+    (tmp_path / "c.yaml").write_text("- name: a\n")
+    with pytest.raises(KeyError, match="Duplicates for 'a' found."):
+        connections.get("b")
+    (tmp_path / "c.yaml").unlink()
+    assert connections.get("b")
+
+
+def test_registry_parses_once(tmp_path):
+    """ Test lookups through config.load don't parse unchanged files again."""
+    (tmp_path / "a.yaml").write_text("- name: a\n  flavour: postgres\n")
+    with patch.dict("os.environ", {"REVLIB_CONNECTIONS": tmp_path.as_posix()}):
+        from_path = config.Dicts.from_path
+        with patch("revlibs.connections.config.Dicts.from_path", wraps=from_path) as f:
+            assert config.load("a").flavour == "postgres"
+            assert config.load("a").flavour == "postgres"
+            assert f.call_count == 1
+            config.reload()
+            config.load("a")
+            assert f.call_count == 2
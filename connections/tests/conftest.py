@@ -0,0 +1,12 @@
+""" Shared test fixtures."""
+import pytest
+
+from revlibs.connections import health
+
+
+@pytest.fixture(autouse=True)
+def reset_health():
+    """ Host health recorded by one test doesn't reorder the hosts of another."""
+    health.tracker().reset()
+    yield
+    health.tracker().reset()
@@ -1,4 +1,6 @@
 """ Test connection library."""
+import threading
+import time
 from pathlib import Path
 from unittest.mock import patch
 from unittest.mock import call
@@ -184,3 +186,180 @@ def test_get_connector_closed_connection():
         connector.get_connection()
 
         assert mocked_conn.call_count == 2
+
+
+@patch.dict("os.environ", TEST_ENVIRONMENT)
+def test_sequential_postgres_stops_at_first_connection():
+    """ Hosts after the first reachable one are not connected to."""
+    with patch("psycopg2.connect") as mocked_conn:
+        with get("postgres_multi_server"):
+            pass
+
+    mocked_conn.assert_called_once()
+
+
+@patch.dict("os.environ", TEST_ENVIRONMENT)
+def test_race_postgres():
+    """ The first host to answer wins, and late connections are closed."""
+    slow, fast = ConnectionMock(), ConnectionMock()
+    answered = threading.Event()
+
+    def connect(dsn, **kwargs):
+        if dsn == "host=127.0.0.1 port=5436":
+            answered.wait(5)
+            return slow
+        if dsn == "host=127.0.0.2 port=5436":
+            raise psycopg2.OperationalError("refused")
+        return fast
+
+    with patch("psycopg2.connect", side_effect=connect) as mocked_conn:
+        start = time.monotonic()
+        with get("postgres_race") as conn:
+            assert conn is fast
+            assert time.monotonic() - start < 1
+            answered.set()
+
+    conn.close.assert_called_once()
+    assert mocked_conn.call_count == 3
+    for _ in range(100):
+        if slow.close.called:
+            break
+        time.sleep(0.01)
+    slow.close.assert_called_once()
+
+
+@patch.dict("os.environ", TEST_ENVIRONMENT)
+def test_race_postgres_failures():
+    """ Failures of every host are reported."""
+    with pytest.raises(ConnectionEstablishError) as err:
+        with patch("psycopg2.connect", side_effect=psycopg2.OperationalError("refused")):
+            get_connector("postgres_race").get_connection()
+
+    assert str(err.value) == (
+        "Could not connect to postgres_race: "
+        "127.0.0.1:5436: refused; "
+        "127.0.0.2:5436: refused; "
+        "127.0.0.3:5436: refused "
+        "[dsn=127.0.0.1:5436,127.0.0.2:5436,127.0.0.3:5436 user=test dbname=None]"
+    )
+
+
+@patch.dict("os.environ", TEST_ENVIRONMENT)
+def test_postgres_skips_failing_host():
+    """ A host that failed is tried after the others next time."""
+    with patch("psycopg2.connect") as mocked_conn:
+        mocked_conn.side_effect = [psycopg2.OperationalError, ConnectionMock(), ConnectionMock()]
+        get_connector("postgres_multi_server").get_connection()
+        get_connector("postgres_multi_server").get_connection()
+
+    assert [c.args[0] for c in mocked_conn.call_args_list] == [
+        "host=127.0.0.1 port=5436",
+        "host=127.0.0.2 port=5436",
+        "host=127.0.0.2 port=5436",
+    ]
+
+
+@patch.dict("os.environ", TEST_ENVIRONMENT)
+def test_stream_postgres():
+    """ Postgres streams batches through a named server-side cursor."""
+    with patch("psycopg2.connect") as mocked_conn:
+        mocked_conn.return_value.autocommit = False
+        cursor = mocked_conn.return_value.cursor.return_value
+        cursor.fetchmany.side_effect = [[(1,), (2,)], [(3,)], []]
+
+        connector = get_connector("postgres_simple")
+        batches = list(connector.stream("SELECT * FROM t WHERE a > %s;", (0,), batch_size=2))
+
+    assert batches == [[(1,), (2,)], [(3,)]]
+    name = mocked_conn.return_value.cursor.call_args[1]["name"]
+    assert name.startswith("revlibs_stream_")
+    assert cursor.itersize == 2
+    cursor.execute.assert_called_with("SELECT * FROM t WHERE a > %s;", (0,))
+    cursor.fetchmany.assert_called_with(2)
+    cursor.close.assert_called()
+
+
+@patch.dict("os.environ", TEST_ENVIRONMENT)
+def test_stream_closed_early():
+    """ Batches are fetched as they are consumed, and the cursor closed with the stream."""
+    with patch("psycopg2.connect") as mocked_conn:
+        cursor = mocked_conn.return_value.cursor.return_value
+        cursor.fetchmany.side_effect = [[(1,)], [(2,)], [(3,)], []]
+
+        stream = get_connector("postgres_simple").stream("SELECT 1;", batch_size=1)
+        assert next(stream) == [(1,)]
+        assert cursor.fetchmany.call_count == 1
+        stream.close()
+
+    cursor.close.assert_called()
+
+
+@patch.dict("os.environ", TEST_ENVIRONMENT)
+def test_stream_exasol():
+    """ Exasol streams batches from the statement."""
+    with patch("pyexasol.connect") as mocked_conn:
+        statement = mocked_conn.return_value.execute.return_value
+        statement.fetchmany.side_effect = [[{"a": 1}], []]
+
+        batches = list(get_connector("exasol_multi_server").stream("SELECT 1 AS a;"))
+
+    assert batches == [[{"a": 1}]]
+    statement.fetchmany.assert_called_with(10000)
+    statement.close.assert_called()
+
+
+@patch.dict("os.environ", TEST_ENVIRONMENT)
+def test_exasol_fetch_dict_param():
+    """ Rows can be fetched as tuples by setting fetch_dict in the params."""
+    with patch("pyexasol.connect") as mocked_conn:
+        with get("exasol_tuples"):
+            pass
+
+    assert mocked_conn.call_args[1]["fetch_dict"] is False
+
+
+@patch.dict("os.environ", TEST_ENVIRONMENT)
+def test_bulk_load_postgres():
+    """ Postgres bulk loads COPY a CSV stream, one statement per batch."""
+    copied = []
+
+    def copy_expert(statement, stream):
+        copied.append((repr(statement), stream.read()))
+
+    with patch("psycopg2.connect") as mocked_conn:
+        mocked_conn.return_value.encoding = "UTF8"
+        cursor = mocked_conn.return_value.cursor.return_value.__enter__.return_value
+        cursor.copy_expert.side_effect = copy_expert
+
+        rows = ({"id": n, "name": f"n{n}"} for n in range(3))
+        result = get_connector("postgres_simple").bulk_load(
+            "s.t", rows, columns=["id", "name"], batch_size=2
+        )
+
+    assert result.rows == 3
+    assert result.batches == 2
+    assert result.rows_per_second > 0
+    assert [data for _, data in copied] == [b"0,n0\n1,n1\n", b"2,n2\n"]
+    statement = copied[0][0]
+    assert "Identifier('s', 't')" in statement
+    assert "Identifier('id'), SQL(', '), Identifier('name')" in statement
+    assert "FROM STDIN WITH (FORMAT csv)" in statement
+
+
+@patch.dict("os.environ", TEST_ENVIRONMENT)
+def test_bulk_load_exasol():
+    """ Exasol bulk loads IMPORT rows from an iterable."""
+    imported = []
+
+    def import_from_iterable(src, table, import_params):
+        imported.append((list(src), table, import_params))
+
+    with patch("pyexasol.connect") as mocked_conn:
+        mocked_conn.return_value.import_from_iterable.side_effect = import_from_iterable
+
+        rows = ((n, f"n{n}") for n in range(3))
+        result = get_connector("exasol_multi_server").bulk_load("s.t", rows, batch_size=None)
+
+    assert result.rows == 3
+    assert result.batches == 1
+    assert imported == [([(0, "n0"), (1, "n1"), (2, "n2")], ("s", "t"), None)]
@@ -0,0 +1,79 @@
+""" Test the flavour registry."""
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from revlibs.connections import flavours, get, get_connector, register_flavour
+from revlibs.connections.connectors import BaseConnector, PostgresConnector
+from revlibs.connections.exceptions import ConnectionParamsError
+
+
+TEST_CONNECTIONS = Path(__name__).parent / "resources" / "test_connections/"
+TEST_ENVIRONMENT = {"REVLIB_CONNECTIONS": TEST_CONNECTIONS.as_posix()}
+
+
+class CustomConnector(BaseConnector):
+    """ An in-process flavour."""
+
+    @staticmethod
+    def _connect(config):
+        return {"dsn": config.dsn, "closed": False}
+
+    @staticmethod
+    def _is_connection_closed(connection):
+        return connection["closed"]
+
+
+class MissingDriverConnector(CustomConnector):
+    driver = "a_driver_which_is_not_installed"
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    with patch.dict("os.environ", TEST_ENVIRONMENT):
+        with patch.dict(flavours._flavours):
+            yield
+
+
+def test_drivers_imported_lazily():
+    """ Importing the package doesn't import any driver."""
+    code = (
+        "import sys, revlibs.connections;"
+        "print('psycopg2' in sys.modules, 'pyexasol' in sys.modules)"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code], universal_newlines=True)
+    assert output.split() == ["False", "False"]
+
+
+def test_register_flavour():
+    register_flavour("custom", CustomConnector)
+    with patch.object(CustomConnector, "close"):
+        with get("custom_flavour") as connection:
+            assert connection == {"dsn": "127.0.0.1:1111", "closed": False}
+    assert "custom" in flavours.flavours()
+
+
+def test_flavour_by_path():
+    register_flavour("custom", f"{__name__}:CustomConnector")
+    assert isinstance(get_connector("custom_flavour"), CustomConnector)
+
+
+def test_flavour_entry_points():
+    entry_points = {"custom": f"{__name__}:CustomConnector"}
+    with patch("revlibs.connections.flavours._entry_points", return_value=entry_points):
+        with patch.object(flavours, "_entry_points_loaded", False):
+            assert isinstance(get_connector("custom_flavour"), CustomConnector)
+            assert flavours.get_flavour("postgres") is PostgresConnector
+
+
+def test_missing_driver():
+    register_flavour("custom", MissingDriverConnector)
+    with pytest.raises(ConnectionParamsError) as err:
+        get_connector("custom_flavour")
+
+    assert str(err.value).startswith(
+        "Could not connect to custom_flavour: driver for custom is not installed"
+    )
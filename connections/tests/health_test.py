@@ -0,0 +1,84 @@
+""" Test host health tracking."""
+from unittest.mock import patch
+
+from revlibs.connections.connectors import expand_dsn
+from revlibs.connections.health import HealthTracker
+
+
+HOSTS = ["a:1", "b:1", "c:1"]
+
+
+def test_expand_dsn():
+    """ Host ranges are expanded, keeping zero padding."""
+    assert expand_dsn("127.0.0.1..3:8888,db:5432") == [
+        "127.0.0.1:8888",
+        "127.0.0.2:8888",
+        "127.0.0.3:8888",
+        "db:5432",
+    ]
+    assert expand_dsn("exa08..10.local:8563") == [
+        "exa08.local:8563",
+        "exa09.local:8563",
+        "exa10.local:8563",
+    ]
+
+
+def test_order_by_health():
+    """ Fast hosts come first, then untried ones, then failing ones."""
+    health = HealthTracker()
+    assert health.order(HOSTS) == HOSTS
+
+    health.record_failure("a:1")
+    health.record_success("c:1", 0.5)
+    health.record_success("b:1", 0.1)
+    assert health.order(HOSTS) == ["b:1", "c:1", "a:1"]
+
+    for _ in range(10):
+        health.record_success("c:1", 0.01)
+    assert health.order(HOSTS) == ["c:1", "b:1", "a:1"], "latency is a moving average"
+
+
+def test_circuit_breaker():
+    """ Hosts failing repeatedly are skipped, until a half-open probe."""
+    health = HealthTracker(failure_threshold=2, reset_timeout=10)
+    with patch("time.time", return_value=1000.0):
+        health.record_failure("a:1")
+        health.record_success("b:1", 1.0)
+        assert health["a:1"].opened_at is None
+        health.record_failure("a:1")
+        assert health["a:1"].opened_at == 1000.0
+        assert health.order(HOSTS) == ["b:1", "c:1", "a:1"]
+
+    with patch("time.time", return_value=1011.0):
+        assert health.order(["d:1", "a:1"]) == ["a:1", "d:1"], "the probe is tried first"
+        assert health.order(["d:1", "a:1"]) == ["a:1", "d:1"], "until it is attempted"
+        health.record_attempt("a:1")
+        assert health.order(["a:1", "d:1"]) == ["d:1", "a:1"], "one probe at a time"
+        health.record_success("a:1", 1.0)
+        assert health["a:1"].opened_at is None and health["a:1"].failures == 0
+
+
+def test_recovered_host_first():
+    """ A fast host regains first place once its half-open probe succeeds."""
+    health = HealthTracker(failure_threshold=2, reset_timeout=10)
+    with patch("time.time", return_value=1000.0):
+        health.record_success("a:1", 0.01)
+        health.record_success("b:1", 0.5)
+        health.record_failure("a:1")
+        health.record_failure("a:1")
+        assert health.order(HOSTS) == ["b:1", "c:1", "a:1"]
+
+    with patch("time.time", return_value=1011.0):
+        assert health.order(HOSTS) == ["a:1", "b:1", "c:1"]
+        health.record_attempt("a:1")
+        health.record_success("a:1", 0.01)
+        assert health.order(HOSTS) == ["a:1", "b:1", "c:1"]
+
+
+def test_shared_state_file(tmp_path):
+    """ Processes share host health through a state file."""
+    state = tmp_path / "health.json"
+    HealthTracker(state, failure_threshold=1).record_failure("a:1")
+    other = HealthTracker(state)
+    assert other["a:1"].failures == 1
+    assert other.order(HOSTS) == ["b:1", "c:1", "a:1"]
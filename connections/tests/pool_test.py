@@ -0,0 +1,149 @@
+""" Test connection pools."""
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+import psycopg2
+
+from revlibs.connections import ConnectionPool, close_pools, get, get_connector, pool
+from revlibs.connections.exceptions import ConnectionEstablishError, PoolTimeoutError
+
+
+TEST_CONNECTIONS = Path(__name__).parent / "resources" / "test_connections/"
+TEST_ENVIRONMENT = {
+    "REVLIB_CONNECTIONS": TEST_CONNECTIONS.as_posix(),
+    "TEST_PASS": "IamAwizard",
+}
+
+
+def open_connection(*args, **kwargs):
+    return MagicMock(closed=False)
+
+
+@pytest.fixture
+def mocked_connect():
+    with patch.dict("os.environ", TEST_ENVIRONMENT):
+        with patch("psycopg2.connect", side_effect=open_connection) as connect:
+            yield connect
+    close_pools()
+
+
+def test_pool_reuses_connections(mocked_connect):
+    """ Returned connections are rolled back, and checked out again."""
+    with ConnectionPool(get_connector("postgres_simple"), min_size=1) as connections:
+        assert mocked_connect.call_count == 1
+        with connections.connection() as first:
+            first.execute("SELECT 1")
+        first.rollback.assert_called_once()
+
+        with connections.connection() as second:
+            assert second is first
+        assert mocked_connect.call_count == 1
+        assert (connections.size, connections.idle) == (1, 1)
+
+    first.close.assert_called_once()
+    with pytest.raises(ConnectionEstablishError):
+        connections.acquire()
+
+
+def test_pool_timeout(mocked_connect):
+    """ Checkouts wait for a returned connection, up to the timeout."""
+    connections = ConnectionPool(get_connector("postgres_simple"), max_size=1, timeout=0.05)
+    first = connections.acquire()
+    with pytest.raises(PoolTimeoutError):
+        connections.acquire()
+
+    threading.Timer(0.05, connections.release, [first]).start()
+    assert connections.acquire(timeout=5) is first
+
+
+def test_pool_rejects_unknown_returns(mocked_connect):
+    """ Connections returned twice, or not checked out of the pool, are rejected."""
+    connections = ConnectionPool(get_connector("postgres_simple"), max_size=2)
+    first = connections.acquire()
+    connections.release(first)
+    with pytest.raises(ValueError):
+        connections.release(first)
+    with pytest.raises(ValueError):
+        connections.release(MagicMock(closed=False))
+
+    assert connections.idle == 1
+    assert connections.acquire() is first
+    assert connections.acquire() is not first
+
+
+def test_pool_closes_idle_connections(mocked_connect):
+    """ Under steady traffic, connections left idle since a burst are closed."""
+    connections = ConnectionPool(get_connector("postgres_simple"), min_size=1, max_idle=0.1)
+    burst = [connections.acquire() for _ in range(5)]
+    for connection in burst:
+        connections.release(connection)
+
+    deadline = time.monotonic() + 0.3
+    while time.monotonic() < deadline:
+        with connections.connection():
+            time.sleep(0.01)
+
+    assert connections.size == 1
+    assert sum(connection.close.call_count for connection in burst) == 4
+
+
+def test_pool_recycles_connections(mocked_connect):
+    """ Old, idle, closed and broken connections are replaced."""
+    connections = ConnectionPool(get_connector("postgres_simple"), max_age=0.05)
+    with connections.connection() as first:
+        time.sleep(0.06)
+    first.close.assert_called_once()
+    assert connections.size == 0
+
+    connections = ConnectionPool(get_connector("postgres_simple"), max_idle=0.05)
+    with connections.connection() as first:
+        pass
+    time.sleep(0.06)
+    with connections.connection() as second:
+        assert second is not first
+    first.close.assert_called_once()
+
+    with connections.connection() as broken:
+        broken.rollback.side_effect = psycopg2.OperationalError
+    broken.close.assert_called_once()
+    assert (connections.size, connections.idle) == (0, 0)
+
+
+def test_pool_threads(mocked_connect):
+    """ Concurrent checkouts never exceed max_size connections."""
+    connections = ConnectionPool(get_connector("postgres_simple"), max_size=3)
+    in_use, peak = set(), []
+    lock = threading.Lock()
+
+    def work():
+        for _ in range(20):
+            with connections.connection() as connection:
+                with lock:
+                    assert connection not in in_use
+                    in_use.add(connection)
+                    peak.append(len(in_use))
+                time.sleep(0.001)
+                with lock:
+                    in_use.remove(connection)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) <= 3
+    assert mocked_connect.call_count == 3
+
+
+def test_get_pooled(mocked_connect):
+    """ get(pooled=True) shares the process-wide pool."""
+    with get("postgres_simple", pooled=True) as first:
+        pass
+    with get("postgres_simple", pooled=True) as second:
+        assert second is first
+    assert pool("postgres_simple").size == 1
+    first.close.assert_not_called()
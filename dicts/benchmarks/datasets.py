@@ -0,0 +1,105 @@
+"""
+Generators of synthetic config directories for the benchmarks.
+
+Every generator writes `n` documents to a directory, spread over files in
+a particular shape, and is deterministic for a given seed so that runs
+can be compared.
+"""
+from typing import Any, Callable, Dict, Iterable, List
+
+import json
+import random
+from pathlib import Path
+
+from ruamel.yaml import YAML
+
+
+DIETS = ("meat", "grass", "fish", "insects")
+REGIONS = ("africa", "asia", "europe", "americas", "oceania")
+
+
+def document(i: int, rng: random.Random) -> Dict[str, Any]:
+    """A config-like document with a few scalars, a list and a nested dict"""
+    return {
+        "name": f"animal-{i}",
+        "size": rng.randint(1, 1000),
+        "diet": rng.choice(DIETS),
+        "region": rng.choice(REGIONS),
+        "speed": round(rng.uniform(0, 120), 2),
+        "tags": [rng.choice(DIETS) for _ in range(3)],
+        "location": {
+            "lat": round(rng.uniform(-90, 90), 4),
+            "lon": round(rng.uniform(-180, 180), 4),
+        },
+    }
+
+
+def documents(n: int, seed: int = 0, disabled: float = 0.0) -> List[Dict[str, Any]]:
+    """n documents, of which about the `disabled` fraction are disabled"""
+    rng = random.Random(seed)
+    docs = [document(i, rng) for i in range(n)]
+    for doc in docs:
+        if rng.random() < disabled:
+            doc["disabled"] = True
+    return docs
+
+
+def _chunks(items: List[Any], n: int) -> Iterable[List[Any]]:
+    size = max(1, -(-len(items) // n))
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _write_yaml(path: Path, docs: Iterable[Any]) -> None:
+    with path.open("w") as f:
+        YAML(typ="safe", pure=True).dump_all(docs, f)
+
+
+def many_small_files(directory: Path, n: int, seed: int = 0) -> None:
+    """One yaml document per file"""
+    for i, doc in enumerate(documents(n, seed)):
+        _write_yaml(directory / f"{i:07d}.yaml", [doc])
+
+
+def few_huge_files(directory: Path, n: int, seed: int = 0, files: int = 4) -> None:
+    """A few json files, each holding a list of many documents"""
+    for i, chunk in enumerate(_chunks(documents(n, seed), files)):
+        (directory / f"{i:03d}.json").write_text(json.dumps(chunk))
+
+
+def multi_document_yaml(directory: Path, n: int, seed: int = 0, per_file: int = 100) -> None:
+    """Yaml files of up to per_file documents separated by ---"""
+    docs = documents(n, seed)
+    for i, chunk in enumerate(_chunks(docs, max(1, len(docs) // per_file))):
+        _write_yaml(directory / f"{i:05d}.yaml", chunk)
+
+
+def lists_of_dicts(directory: Path, n: int, seed: int = 0, per_file: int = 100) -> None:
+    """Yaml files each holding a single list of up to per_file documents"""
+    docs = documents(n, seed)
+    for i, chunk in enumerate(_chunks(docs, max(1, len(docs) // per_file))):
+        _write_yaml(directory / f"{i:05d}.yaml", [chunk])
+
+
+def disabled_mix(directory: Path, n: int, seed: int = 0, per_file: int = 10) -> None:
+    """Small json files where about a third of the documents are disabled"""
+    docs = documents(n, seed, disabled=1 / 3)
+    for i, chunk in enumerate(_chunks(docs, max(1, len(docs) // per_file))):
+        (directory / f"{i:05d}.json").write_text(json.dumps(chunk))
+
+
+DATASETS: Dict[str, Callable[..., None]] = {
+    "many_small_files": many_small_files,
+    "few_huge_files": few_huge_files,
+    "multi_document_yaml": multi_document_yaml,
+    "lists_of_dicts": lists_of_dicts,
+    "disabled_mix": disabled_mix,
+}
+
+
+def generate(name: str, directory: Path, n: int, seed: int = 0) -> Path:
+    """Writes the named dataset of n documents to a new directory, and returns it"""
+    directory = Path(directory) / f"{name}-{n}"
+    directory.mkdir(parents=True, exist_ok=False)
+    DATASETS[name](directory, n, seed)
+    return directory
@@ -0,0 +1,159 @@
+"""
+Benchmarks of loading and grouping with revlibs.dicts.
+
+Generates synthetic datasets in a temporary directory on local disk, then
+measures for each dataset and size:
+
+ - load: Dicts.from_path wall time, documents and megabytes per second,
+   and the peak memory traced by tracemalloc
+ - key_by, map_by and filter over the loaded items
+
+Results are written as JSON, and can be compared with a previous run:
+
+    python benchmarks/run.py --sizes 1000,10000 --output after.json --compare before.json
+
+revlibs-dicts must be importable, e.g. installed with `pip install -e .`
+"""
+from typing import Any, Callable, Dict, List, Optional
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from datasets import DATASETS, generate
+
+from revlibs.dicts import Dicts
+
+
+DEFAULT_SIZES = (1000, 10000)
+DEFAULT_REPEAT = 3
+
+
+def _best(f: Callable[[], Any], repeat: int) -> float:
+    """The fastest of repeat runs, in seconds"""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _peak_memory(f: Callable[[], Any]) -> int:
+    """The peak bytes allocated while running f, traced separately as tracing is slow"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        f()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _size(directory: Path) -> int:
+    return sum(path.stat().st_size for path in directory.iterdir())
+
+
+def bench(directory: Path, repeat: int, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Benchmarks loading a dataset and grouping its items"""
+    load = lambda: Dicts.from_path(directory, **options)  # noqa: E731
+    loaded = load()
+    documents = len(loaded.items)
+    load_seconds = _best(load, repeat)
+
+    items = loaded.items
+    operations = {
+        "key_by": lambda: Dicts.from_dicts(items).key_by("diet", None),
+        "map_by": lambda: Dicts.from_dicts(items).map_by("name", None),
+        "filter": lambda: list(Dicts.from_dicts(items).filter(lambda d: d["size"] > 500).items),
+    }
+
+    return {
+        "files": sum(1 for _ in directory.iterdir()),
+        "bytes": _size(directory),
+        "documents": documents,
+        "load": {
+            "seconds": load_seconds,
+            "documents_per_second": documents / load_seconds,
+            "megabytes_per_second": _size(directory) / load_seconds / 1e6,
+            "peak_bytes": _peak_memory(load),
+        },
+        **{name: {"seconds": _best(f, repeat)} for name, f in operations.items()},
+    }
+
+
+def run(
+    datasets: List[str], sizes: List[int], repeat: int, options: Dict[str, Any]
+) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "options": options,
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="dicts-benchmarks-") as tmp:
+        for name in datasets:
+            for n in sizes:
+                directory = generate(name, Path(tmp), n)
+                result = bench(directory, repeat, options)
+                results["results"][f"{name}/{n}"] = result
+                print(
+                    f"{name:>20} {n:>8}: load {result['load']['seconds']:8.3f}s "
+                    f"({result['load']['documents_per_second']:10.0f} docs/s, "
+                    f"peak {result['load']['peak_bytes'] / 1e6:8.1f}MB), "
+                    f"key_by {result['key_by']['seconds']:.4f}s, "
+                    f"map_by {result['map_by']['seconds']:.4f}s, "
+                    f"filter {result['filter']['seconds']:.4f}s"
+                )
+    return results
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any]) -> None:
+    """Prints the ratio of each time in after to the same in before, below 1 being faster"""
+    for key, result in after["results"].items():
+        previous = before["results"].get(key)
+        if previous is None:
+            continue
+        ratios = [
+            f"{operation} {result[operation]['seconds'] / previous[operation]['seconds']:.2f}x"
+            for operation in ("load", "key_by", "map_by", "filter")
+            if previous[operation]["seconds"]
+        ]
+        print(f"{key:>30}: {', '.join(ratios)}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--datasets", default=",".join(DATASETS), help="comma separated")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="documents")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--parser", default=None, help="the yaml parser, rt, safe or fast")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--compare", type=Path, help="a previous JSON output to compare with")
+    args = parser.parse_args(argv)
+
+    options = {"parser": args.parser, "workers": args.workers}
+    results = run(
+        [name for name in args.datasets.split(",") if name],
+        [int(n) for n in args.sizes.split(",")],
+        args.repeat,
+        {k: v for k, v in options.items() if v is not None},
+    )
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.compare:
+        compare(json.loads(args.compare.read_text()), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+from revlibs.dicts.cache import ParseCache
+from revlibs.dicts.exceptions import ItemError, ValidationError
+from revlibs.dicts.records import Record
+from revlibs.dicts.schema import compile_schema
+from revlibs.dicts.stats import FileStats, LoadStats
+from revlibs.dicts.parsers import set_default_parser, get_default_parser
+from revlibs.dicts.dicts import (
+    Dicts,
+    PATH_KEY,
+    DEFAULT_PATH_KEY,
+    DISABLED_KEY,
+    DEFAULT_KEY,
+)
@@ -0,0 +1,180 @@
+"""An on-disk cache of parsed documents, so warm starts can skip parsing"""
+from typing import Any, List, Optional
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+
+log = logging.getLogger(__name__)
+
+# The cache directory can be moved with an environment variable
+_ENV_VAR_FOR_DIRECTORY = "REVLIB_DICTS_CACHE"
+_DEFAULT_DIRECTORY = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "revlibs-dicts"
+)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+ENTRY_SUFFIX = ".pickle"
+
+
+def content_hash(content: bytes) -> str:
+    """A digest of a file's contents"""
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+class ParseCache:
+    """
+    Stores the parsed documents of a file, one entry per resolved path and
+    variant, so files parsed in different ways don't replace each other's entry.
+
+    An entry is only used when the size, mtime and content hash of the file
+    match those it was stored with. The cache is bounded by max_bytes, after
+    which the least recently used entries are evicted.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        if directory is None:
+            directory = Path(os.environ.get(_ENV_VAR_FOR_DIRECTORY, _DEFAULT_DIRECTORY))
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        # Estimated size of the cache, computed on the first write
+        self.__size: Optional[int] = None
+
+    def __repr__(self):
+        return f"ParseCache({self.directory.as_posix()!r}, max_bytes={self.max_bytes})"
+
+    @staticmethod
+    def __name(path: Path) -> str:
+        return hashlib.blake2b(path.as_posix().encode(), digest_size=16).hexdigest()
+
+    def __entry(self, path: Path, variant: str) -> Path:
+        suffix = hashlib.blake2b(variant.encode(), digest_size=4).hexdigest()
+        return self.directory / f"{self.__name(path)}-{suffix}{ENTRY_SUFFIX}"
+
+    @staticmethod
+    def __fingerprint(path: Path, stat: os.stat_result, digest: str, variant: str) -> tuple:
+        return (path.as_posix(), stat.st_size, stat.st_mtime_ns, digest, variant)
+
+    def get(
+        self, path: Path, stat: os.stat_result, digest: str, variant: str = ""
+    ) -> Optional[List[Any]]:
+        """
+        Returns the documents stored for a file, or None if there is no entry
+        or the file has changed since it was stored.
+        `variant` distinguishes entries parsed in different ways.
+        """
+        entry = self.__entry(path, variant)
+        try:
+            with entry.open("rb") as f:
+                if pickle.load(f) != self.__fingerprint(path, stat, digest, variant):
+                    return None
+                documents = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning(f"Dropping unreadable cache entry for {path}: {e}")
+            try:
+                entry.unlink()
+            except FileNotFoundError:
+                pass
+            return None
+
+        # Bump the entry's mtime, which is what eviction goes by
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return documents
+
+    def put(
+        self,
+        path: Path,
+        stat: os.stat_result,
+        digest: str,
+        documents: List[Any],
+        variant: str = "",
+    ) -> None:
+        """Stores the documents of a file, replacing any previous entry"""
+        tmp = None
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                fingerprint = self.__fingerprint(path, stat, digest, variant)
+                pickle.dump(fingerprint, f, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(documents, f, pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+
+            if size > self.max_bytes:
+                log.debug(f"Not caching {path}, {size} bytes exceed the cache size")
+                os.unlink(tmp)
+                return
+
+            os.replace(tmp, self.__entry(path, variant))
+        except Exception as e:
+            log.warning(f"Could not cache {path}: {e}")
+            if tmp and os.path.exists(tmp):
+                os.unlink(tmp)
+            return
+
+        if self.__size is None:
+            self.__size = self.__scan_size()
+        else:
+            self.__size += size
+
+        if self.__size > self.max_bytes:
+            self.__evict()
+
+    def __entries(self) -> List[os.DirEntry]:
+        try:
+            with os.scandir(self.directory) as it:
+                return [entry for entry in it if entry.name.endswith(ENTRY_SUFFIX)]
+        except FileNotFoundError:
+            return []
+
+    def __scan_size(self) -> int:
+        return sum(entry.stat().st_size for entry in self.__entries())
+
+    def __evict(self) -> None:
+        """Removes the least recently used entries until the cache fits max_bytes"""
+        entries = []
+        for entry in self.__entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+        log.debug(f"Evicted cache entries down to {total} bytes")
+        self.__size = total
+
+    def invalidate(self, path: Optional[Path] = None) -> None:
+        """Removes the entries of a path, or every entry if no path is given"""
+        if path is None:
+            for entry in self.__entries():
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+            self.__size = 0
+            return
+
+        for entry in self.directory.glob(f"{self.__name(Path(path).resolve())}-*{ENTRY_SUFFIX}"):
+            try:
+                entry.unlink()
+            except FileNotFoundError:
+                pass
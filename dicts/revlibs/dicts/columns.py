@@ -0,0 +1,357 @@
+"""
+A columnar view of a collection of dicts, with column-wise filter expressions.
+
+Numeric columns are stored in NumPy arrays when NumPy is installed, or in stdlib
+arrays otherwise, and other columns in lists. Expressions such as
+(col("size") > 10) & col("diet").isin(["meat"]) are evaluated a column at a time,
+with NumPy's vectorized operations where possible.
+"""
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import logging
+import math
+import operator
+from array import array
+from itertools import compress
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+log = logging.getLogger(__name__)
+
+# A boolean per row, a NumPy array or a list
+Mask = Union["np.ndarray", List[bool]]
+
+_INT_TYPECODE = "q"
+_FLOAT_TYPECODE = "d"
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _to_column(values: List[Any]) -> Sequence[Any]:
+    """Stores all-int or all-number values in an array, anything else in a list"""
+    if not values:
+        return values
+
+    if all(_is_int(v) for v in values):
+        kind = _INT_TYPECODE
+    elif all(_is_number(v) for v in values):
+        kind = _FLOAT_TYPECODE
+    else:
+        return values
+
+    try:
+        if np is not None:
+            return np.array(values, dtype=np.int64 if kind == _INT_TYPECODE else np.float64)
+        return array(kind, values)
+    except OverflowError:
+        return values
+
+
+def _is_array(column: Sequence[Any]) -> bool:
+    return not isinstance(column, list)
+
+
+def _mask(values: Iterable[bool]) -> Mask:
+    if np is not None:
+        return np.fromiter(values, dtype=bool)
+    return list(values)
+
+
+def _safe(op: Callable[[Any, Any], bool]) -> Callable[[Any, Any], bool]:
+    """Compares as in rows, where a missing value or mismatched types never match"""
+
+    def compare(value: Any, other: Any) -> bool:
+        if value is None:
+            return op is operator.ne and other is not None
+        try:
+            return bool(op(value, other))
+        except TypeError:
+            return op is operator.ne
+
+    return compare
+
+
+class Expr:
+    """A predicate over the columns of a row, evaluated a column at a time"""
+
+    def evaluate(self, columns: "Columns") -> Mask:
+        """Returns a mask of the rows for which the expression holds"""
+        raise NotImplementedError
+
+    def __call__(self, row: Dict[str, Any]) -> bool:
+        """Evaluates the expression for a single row, so it can be used in Dicts.filter"""
+        raise NotImplementedError
+
+    def __and__(self, other: "Expr") -> "Expr":
+        return _Combined(operator.and_, self, other)
+
+    def __or__(self, other: "Expr") -> "Expr":
+        return _Combined(operator.or_, self, other)
+
+    def __invert__(self) -> "Expr":
+        return _Not(self)
+
+
+class _Comparison(Expr):
+    def __init__(self, name: str, op: Callable[[Any, Any], bool], value: Any):
+        self.name = name
+        self.op = op
+        self.value = value
+        self.compare = _safe(op)
+
+    def __repr__(self):
+        return f"col({self.name!r}) {self.op.__name__} {self.value!r}"
+
+    def evaluate(self, columns: "Columns") -> Mask:
+        column = columns[self.name]
+        if np is not None and _is_array(column) and _is_number(self.value):
+            return self.op(column, self.value)
+        return _mask(self.compare(v, self.value) for v in column)
+
+    def __call__(self, row: Dict[str, Any]) -> bool:
+        return self.compare(row.get(self.name), self.value)
+
+
+class _IsIn(Expr):
+    def __init__(self, name: str, values: Iterable[Any]):
+        self.name = name
+        self.values = set(values)
+
+    def evaluate(self, columns: "Columns") -> Mask:
+        column = columns[self.name]
+        if np is not None and _is_array(column):
+            # Only numbers can equal those of a numeric column, and mixing
+            # in other values would make NumPy compare them all as strings
+            return np.isin(column, [v for v in self.values if isinstance(v, (int, float))])
+        return _mask(v in self.values for v in column)
+
+    def __call__(self, row: Dict[str, Any]) -> bool:
+        return row.get(self.name) in self.values
+
+
+class _IsNull(Expr):
+    def __init__(self, name: str):
+        self.name = name
+
+    def evaluate(self, columns: "Columns") -> Mask:
+        column = columns[self.name]
+        if _is_array(column):
+            return _mask(False for _ in range(len(column)))
+        return _mask(v is None for v in column)
+
+    def __call__(self, row: Dict[str, Any]) -> bool:
+        return row.get(self.name) is None
+
+
+class _Combined(Expr):
+    def __init__(self, op: Callable[[Any, Any], Any], left: Expr, right: Expr):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def evaluate(self, columns: "Columns") -> Mask:
+        left, right = self.left.evaluate(columns), self.right.evaluate(columns)
+        if np is not None:
+            return self.op(left, right)
+        return [bool(self.op(a, b)) for a, b in zip(left, right)]
+
+    def __call__(self, row: Dict[str, Any]) -> bool:
+        return bool(self.op(self.left(row), self.right(row)))
+
+
+class _Not(Expr):
+    def __init__(self, expr: Expr):
+        self.expr = expr
+
+    def evaluate(self, columns: "Columns") -> Mask:
+        mask = self.expr.evaluate(columns)
+        if np is not None:
+            return ~mask
+        return [not m for m in mask]
+
+    def __call__(self, row: Dict[str, Any]) -> bool:
+        return not self.expr(row)
+
+
+class col:
+    """Refers to a column in an expression, for example col("size") > 10"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __eq__(self, value: Any) -> Expr:  # type: ignore
+        return _Comparison(self.name, operator.eq, value)
+
+    def __ne__(self, value: Any) -> Expr:  # type: ignore
+        return _Comparison(self.name, operator.ne, value)
+
+    def __lt__(self, value: Any) -> Expr:
+        return _Comparison(self.name, operator.lt, value)
+
+    def __le__(self, value: Any) -> Expr:
+        return _Comparison(self.name, operator.le, value)
+
+    def __gt__(self, value: Any) -> Expr:
+        return _Comparison(self.name, operator.gt, value)
+
+    def __ge__(self, value: Any) -> Expr:
+        return _Comparison(self.name, operator.ge, value)
+
+    __hash__ = None  # type: ignore
+
+    def isin(self, values: Iterable[Any]) -> Expr:
+        return _IsIn(self.name, values)
+
+    def is_null(self) -> Expr:
+        """Holds where the value is None or missing"""
+        return _IsNull(self.name)
+
+
+def _sum(values: Sequence[Any]) -> Any:
+    if np is not None and _is_array(values):
+        return values.sum().item()
+    return sum(v for v in values if v is not None)
+
+
+def _min(values: Sequence[Any]) -> Any:
+    if np is not None and _is_array(values):
+        return values.min().item() if len(values) else None
+    present = [v for v in values if v is not None]
+    return min(present) if present else None
+
+
+def _max(values: Sequence[Any]) -> Any:
+    if np is not None and _is_array(values):
+        return values.max().item() if len(values) else None
+    present = [v for v in values if v is not None]
+    return max(present) if present else None
+
+
+def _count(values: Sequence[Any]) -> int:
+    if _is_array(values):
+        return len(values)
+    return sum(1 for v in values if v is not None)
+
+
+def _mean(values: Sequence[Any]) -> float:
+    n = _count(values)
+    return _sum(values) / n if n else math.nan
+
+
+AGGREGATES: Dict[str, Callable[[Sequence[Any]], Any]] = {
+    "sum": _sum,
+    "min": _min,
+    "max": _max,
+    "count": _count,
+    "mean": _mean,
+}
+
+
+class Columns:
+    """
+    Dicts stored as one column per key. A dict without a key has None in
+    that key's column, so rows from to_dicts have every key.
+    """
+
+    def __init__(self, columns: Dict[str, Sequence[Any]], length: int):
+        self.columns = columns
+        self.length = length
+
+    @staticmethod
+    def from_items(items: Iterable[Dict[str, Any]], fields: Optional[List[str]] = None):
+        """Builds columns from dicts in one pass, of the given fields or every key found"""
+        values: Dict[str, List[Any]] = {field: [] for field in fields or ()}
+        n = 0
+        for n, item in enumerate(items, start=1):
+            if fields is None:
+                for key in item:
+                    if key not in values:
+                        # Rows before the key first appeared don't have it
+                        values[key] = [None] * (n - 1)
+            for key, column in values.items():
+                column.append(item.get(key))
+
+        return Columns({key: _to_column(column) for key, column in values.items()}, n)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, name: str) -> Sequence[Any]:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __repr__(self):
+        return f"Columns({list(self.columns)}, length={self.length})"
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.columns)
+
+    def select(self, *names: str) -> "Columns":
+        return Columns({name: self.columns[name] for name in names}, self.length)
+
+    def take(self, mask: Mask) -> "Columns":
+        """The rows for which mask holds"""
+        if np is not None:
+            mask = np.asarray(mask, dtype=bool)
+            taken = {
+                name: column[mask] if _is_array(column) else list(compress(column, mask))
+                for name, column in self.columns.items()
+            }
+            return Columns(taken, int(mask.sum()))
+
+        taken = {}
+        for name, column in self.columns.items():
+            kept = compress(column, mask)
+            taken[name] = array(column.typecode, kept) if _is_array(column) else list(kept)
+        return Columns(taken, sum(mask))
+
+    def filter(self, expr: Expr) -> "Columns":
+        return self.take(expr.evaluate(self))
+
+    def aggregate(self, name: str, how: str) -> Any:
+        """Aggregates a column with one of AGGREGATES: sum, min, max, count or mean"""
+        return AGGREGATES[how](self.columns[name])
+
+    def group_by(self, name: str) -> Dict[Any, "Columns"]:
+        """Splits the rows by the values of a column, in order of first appearance"""
+        positions: Dict[Any, List[int]] = {}
+        for i, value in enumerate(self._values(name)):
+            positions.setdefault(value, []).append(i)
+        return {value: self.__rows(rows) for value, rows in positions.items()}
+
+    def __rows(self, rows: List[int]) -> "Columns":
+        """The rows at the given positions"""
+        taken: Dict[str, Sequence[Any]] = {}
+        for name, column in self.columns.items():
+            if not _is_array(column):
+                taken[name] = [column[i] for i in rows]
+            elif np is not None:
+                taken[name] = column[np.array(rows, dtype=np.intp)]
+            else:
+                taken[name] = array(column.typecode, (column[i] for i in rows))
+        return Columns(taken, len(rows))
+
+    def _values(self, name: str) -> Iterable[Any]:
+        """The Python values of a column"""
+        column = self.columns[name]
+        return column.tolist() if np is not None and _is_array(column) else column
+
+    def to_dicts(self) -> Iterator[Dict[str, Any]]:
+        """Yields the rows as dicts"""
+        names = list(self.columns)
+        columns = [self._values(name) for name in names]
+        for row in zip(*columns):
+            yield dict(zip(names, row))
@@ -0,0 +1,1308 @@
+from typing import (
+    Dict,
+    Any,
+    Iterable,
+    Callable,
+    List,
+    Mapping,
+    Optional,
+    Union,
+    Tuple,
+    Hashable,
+    IO,
+)
+
+import io
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from collections import deque
+from fnmatch import fnmatch
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from itertools import chain, islice
+
+from revlibs.dicts import parsers
+from revlibs.dicts.cache import ParseCache, content_hash
+from revlibs.dicts.exceptions import ItemError, ValidationError
+from revlibs.dicts.jsonl import JSONL_SUFFIXES, JsonLines
+from revlibs.dicts.records import RecordFactory
+from revlibs.dicts.schema import Validator, compile_schema
+from revlibs.dicts.snapshot import read_snapshot, write_snapshot
+from revlibs.dicts.stats import FileStats, LoadStats
+from revlibs.dicts.refresh import (
+    DEFAULT_WATCH_INTERVAL,
+    DictsDiff,
+    Fingerprint,
+    Watcher,
+    fingerprint,
+)
+
+
+log = logging.getLogger(__name__)
+
+# "__PATH__" is a default key added to the dict to hint the dict's
+# source location
+PATH_KEY = "__PATH__"
+DEFAULT_PATH_KEY = "_"
+
+# The default key to exclude a dict from being loaded to Dict.items
+DISABLED_KEY = "disabled"
+# The default dictionary key to use in Dict.key_by where
+# Dict.key_by: List[Dicts] => Dict[str -> List[dict]]
+DEFAULT_KEY = "name"
+
+YAML_SUFFIXES = (".yaml", ".yml")
+JSON_SUFFIX = ".json"
+LOADABLE_SUFFIXES = (*YAML_SUFFIXES, JSON_SUFFIX, *JSONL_SUFFIXES)
+
+# A grouping function, a dictionary key, or a tuple of dictionary keys
+Key = Union[Callable[[Any], Hashable], str, Tuple[str, ...]]
+
+# The kinds of Dicts.join
+INNER = "inner"
+LEFT = "left"
+ANTI = "anti"
+JOINS = (INNER, LEFT, ANTI)
+
+# Pools available to load a directory with Dicts(workers=N, executor=...).
+# Threads share the GIL, so only processes parse files in parallel, and
+# threads only help loads bound by I/O
+EXECUTORS = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+DEFAULT_EXECUTOR = "thread"
+# The number of files in flight per worker when loading in parallel
+TASKS_PER_WORKER = 4
+# The items sent to a worker at once by items_as and filter with workers=N
+DEFAULT_CHUNKSIZE = 1
+# The most bytes of a JSON Lines file a worker parses at once
+JSONL_RANGE_BYTES = 16 * 1024 * 1024
+
+
+def _parse(suffix: str, stream: IO[bytes], parser: str) -> Iterable[Any]:
+    """Parses the documents of a yaml or json stream"""
+    if suffix in YAML_SUFFIXES:
+        return parsers.load_all(parser, stream)
+    return [json.load(stream)]
+
+
+def _parse_file(path: Path, parser: str) -> Iterable[Any]:
+    """Parses the documents of a file, JSON Lines records as they are read"""
+    if path.suffix in JSONL_SUFFIXES:
+        yield from JsonLines(path)
+        return
+
+    with path.open("rb") as f:
+        yield from _parse(path.suffix, f, parser)
+
+
+def _parse_cached(path: Path, cache: ParseCache, parser: str) -> Tuple[List[Any], bool]:
+    """
+    Reads the documents of a file from the cache, parsing and storing them on a miss.
+    Returns the documents, and whether they came from the cache
+    """
+    with path.open("rb") as f:
+        stat = os.fstat(f.fileno())
+        content = f.read()
+
+    digest = content_hash(content)
+    documents = cache.get(path, stat, digest, variant=parser)
+    if documents is None:
+        documents = list(_parse(path.suffix, io.BytesIO(content), parser))
+        cache.put(path, stat, digest, documents, variant=parser)
+        return documents, False
+
+    log.debug(f"Loaded {path} from cache")
+    return documents, True
+
+
+def _contents(path: Path, cache: Optional[ParseCache], parser: str) -> Tuple[Iterable[Any], bool]:
+    """The parsed contents of a file, and whether they came from the cache"""
+    if path.suffix not in LOADABLE_SUFFIXES:
+        log.debug(f"Suffix {path.suffix} not loadable for path {path.as_posix()}")
+        return [], False
+
+    # JSON Lines files are streamed, as reading them for the cache would defeat that
+    if cache is None or path.suffix in JSONL_SUFFIXES:
+        return _parse_file(path, parser), False
+    return _parse_cached(path, cache, parser)
+
+
+def _with_path(contents: Iterable[Any], full_path: str) -> Iterable[Dict]:
+    """Flattens lists of dicts, and adds the source path for each dict to PATH_KEY"""
+    for item in contents:
+        if isinstance(item, list):
+            for c in item:
+                c[PATH_KEY] = full_path
+                yield c
+        else:
+            item[PATH_KEY] = full_path
+            yield item
+
+
+def _load_range(path: Path, bounds: Tuple[int, int]) -> List[Dict]:
+    """Loads the records of a JSON Lines file which start within a byte range"""
+    return list(_with_path(JsonLines(path).iter_range(*bounds), path.as_posix()))
+
+
+# The result of loading a file: its path, fingerprint, documents, any error and its stats
+Loaded = Tuple[Path, Optional[Fingerprint], List[Dict], Optional[Exception], FileStats]
+
+
+def _load_path(
+    path: Path, cache: Optional[ParseCache] = None, parser: Optional[str] = None
+) -> Loaded:
+    """
+    Loads all documents of a single file.
+    Instead of raising, an error is returned along with the documents
+    loaded before it, so that the caller can decide whether to skip it
+    """
+    parser = parser or parsers.get_default_parser()
+    documents: List[Dict] = []
+    source, error, cache_hit = None, None, False
+    start = time.perf_counter()
+    try:
+        # Taken before reading, so a concurrent change shows up in the next refresh
+        source = fingerprint(path)
+        contents, cache_hit = _contents(path, cache, parser)
+        documents.extend(_with_path(contents, path.as_posix()))
+    except Exception as e:
+        error = e
+
+    stats = FileStats(
+        path=path.as_posix(),
+        seconds=time.perf_counter() - start,
+        bytes=source[1] if source else 0,
+        documents=len(documents),
+        error=None if error is None else f"{type(error).__name__}: {error}",
+        cache_hit=cache_hit,
+    )
+    return (path, None if error else source, documents, error, stats)
+
+
+def _content_key(path: Path, source: Optional[Fingerprint]) -> Optional[Tuple[int, str]]:
+    """The size and content hash of a file, if it still has the given fingerprint"""
+    try:
+        with path.open("rb") as f:
+            content = f.read()
+        if source is None or fingerprint(path) != source:
+            return None
+    except FileNotFoundError:
+        return None
+    return (len(content), content_hash(content))
+
+
+def _apply(f: Callable[[Any], Any], keep: bool, chunk: List[Any]) -> List[Any]:
+    """
+    Applies f to a chunk of items, returning its results, or the items
+    for which it holds if keep. Errors name the failing item's path.
+    """
+    results = []
+    for item in chunk:
+        try:
+            result = f(item)
+        except Exception as e:
+            try:
+                path = item.get(PATH_KEY)
+            except AttributeError:
+                path = None
+            raise ItemError(path, f"{type(e).__name__}: {e}") from e
+
+        if not keep:
+            results.append(result)
+        elif result:
+            results.append(item)
+    return results
+
+
+def _apply_parallel(
+    f: Callable[[Any], Any],
+    items: Iterable[Any],
+    keep: bool,
+    workers: int,
+    chunksize: int,
+    executor: str,
+) -> Iterable[Any]:
+    """Like map, or filter if keep, in a pool of workers, yielding results in order"""
+    it = iter(items)
+    chunks = iter(lambda: list(islice(it, chunksize)), [])
+    pool = EXECUTORS[executor](max_workers=workers)
+    try:
+        apply = partial(_apply, f, keep)
+        for results in _ordered_map(pool, apply, chunks, workers * TASKS_PER_WORKER):
+            yield from results
+    finally:
+        pool.shutdown(wait=False)
+
+
+def _validated(
+    validator: Validator, items: Iterable[Any], fail_fast: bool, errors: List[ValidationError]
+) -> Iterable[Any]:
+    """
+    Yields the valid items. Raises the first ValidationError if fail_fast,
+    and otherwise logs and collects them in errors
+    """
+    for item in items:
+        problems = validator(item)
+        if not problems:
+            yield item
+            continue
+
+        try:
+            path = item.get(PATH_KEY)
+        except AttributeError:
+            path = None
+        error = ValidationError(path, problems)
+        if fail_fast:
+            raise error
+        log.warning(error.message)
+        errors.append(error)
+
+
+def _has_key(k: Hashable) -> bool:
+    """If a join key can match, which None or a composite key holding None can't"""
+    return k is not None and not (isinstance(k, tuple) and None in k)
+
+
+def _hash_join(
+    probe: Iterable[Any],
+    build: Iterable[Any],
+    probe_key: Callable[[Any], Hashable],
+    build_key: Callable[[Any], Hashable],
+    how: str,
+) -> Iterable[Any]:
+    """Builds a hash table of one side, once iterated over, and streams the other past it"""
+    table: Dict[Hashable, List[Any]] = {}
+    for item in build:
+        k = build_key(item)
+        if _has_key(k):
+            table.setdefault(k, []).append(item)
+
+    for item in probe:
+        k = probe_key(item)
+        matches = table.get(k) if _has_key(k) else None
+        if how == ANTI:
+            if not matches:
+                yield item
+        elif matches:
+            for match in matches:
+                yield (item, match)
+        elif how == LEFT:
+            yield (item, None)
+
+
+def _matches(name: str, relative: str, patterns: Tuple[str, ...]) -> bool:
+    """If a directory entry's name or relative path matches any of the glob patterns"""
+    return any(fnmatch(name, p) or fnmatch(relative, p) for p in patterns)
+
+
+def _patterns(patterns: Union[str, Iterable[str], None]) -> Tuple[str, ...]:
+    """Accepts a single glob pattern or several"""
+    if patterns is None:
+        return ()
+    return (patterns,) if isinstance(patterns, str) else tuple(patterns)
+
+
+def _ordered_map(
+    executor: Executor, f: Callable[[Any], Any], iterable: Iterable[Any], window: int
+) -> Iterable[Any]:
+    """
+    Like Executor.map, but keeps at most `window` tasks in flight, so the
+    input is consumed lazily. Results are yielded in input order.
+    """
+    pending: deque = deque()
+    try:
+        for arg in iterable:
+            pending.append(executor.submit(f, arg))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # Don't run tasks nobody will read, e.g. after an error
+        for future in pending:
+            future.cancel()
+
+
+class Dicts:
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        dicts: Optional[Iterable[Dict]] = None,
+        skip_errors: bool = False,
+        load_disabled: bool = False,
+        disabled_key: str = DISABLED_KEY,
+        workers: Optional[int] = None,
+        executor: str = DEFAULT_EXECUTOR,
+        cache: Union[bool, ParseCache] = False,
+        parser: Optional[str] = None,
+        lazy: bool = False,
+        recursive: bool = False,
+        include: Union[str, Iterable[str], None] = None,
+        exclude: Union[str, Iterable[str], None] = None,
+        compact: bool = False,
+        stats_hook: Optional[Callable[[LoadStats], None]] = None,
+    ):
+        log.debug(f"Loading dicts from {path}")
+
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor {executor}, expected one of {list(EXECUTORS)}")
+
+        self.skip_errors = skip_errors
+        self.load_disabled = load_disabled
+        self.disabled_key = disabled_key
+        self.workers = workers
+        self.executor = executor
+        # cache=True uses the default cache directory
+        self.cache = ParseCache() if cache is True else (cache or None)
+        # Resolved here, so that worker processes use the same parser
+        self.parser = parsers.validate(parser or parsers.get_default_parser())
+
+        self.path = path.resolve() if path else None
+        self.is_path, self.is_dir = self.__classify_path()
+
+        self.lazy = lazy
+        self.recursive = recursive
+        self.include = _patterns(include)
+        self.exclude = _patterns(exclude)
+
+        self.__dicts = dicts
+        # Per file stats of the load, passed to stats_hook once it finishes
+        self.load_stats = LoadStats()
+        self.stats_hook = stats_hook
+        # The errors of items dropped by Dicts.validate(fail_fast=False)
+        self.validation_errors: List[ValidationError] = []
+        # The fingerprint and documents of every loaded file, for Dicts.refresh
+        self.__sources: Dict[str, Tuple[Optional[Fingerprint], List[Dict]]] = {}
+        # The items_as and filter steps, replayed on refresh
+        self.__pipeline: List[Tuple[Callable, Callable]] = []
+        self.__refresh_lock = threading.Lock()
+        # Converts documents to compact records as they are loaded
+        self.__records = RecordFactory(PATH_KEY) if compact else None
+        # Serves positional access to a lazily loaded JSON Lines file
+        self.__json_lines: Optional[JsonLines] = None
+        # Hash indexes built by Dicts.index, by the tuple of fields they are on
+        self.__indexes: Dict[Tuple[str, ...], Dict[Hashable, List[Any]]] = {}
+
+        # Lazy items are only loaded as they are iterated over
+        items = self.__load_items()
+        self.__items = items if lazy else list(items)
+        self.keyed = False
+
+    @property
+    def items(self):
+        """ Returns self.items which may have been cast or filtered downstream"""
+        return self.__items
+
+    def __iter__(self):
+        return iter(self.__items)
+
+    def __getitem__(self, i: Union[int, slice]) -> Any:
+        """
+        Positional access to the items, loading all items of a lazy Dicts.
+        A lazy Dicts of a single JSON Lines file, loading disabled items and
+        without compact records, items_as or filter steps, instead reads
+        records through the file's line index.
+        """
+        if self.lazy and self.is_path and not self.__pipeline:
+            if self.path.suffix in JSONL_SUFFIXES and self.__indexable():
+                return self.__record(i)
+        return self.__materialize()[i]
+
+    def __indexable(self) -> bool:
+        """If the line index's positions are those of the items"""
+        return self.load_disabled and self.__records is None
+
+    def __record(self, i: Union[int, slice]) -> Any:
+        if self.__json_lines is None:
+            self.__json_lines = JsonLines(self.path)
+        records = self.__json_lines[i]
+        full_path = self.path.as_posix()
+        if isinstance(i, slice):
+            return list(_with_path(records, full_path))
+        documents = list(_with_path([records], full_path))
+        return documents if isinstance(records, list) else documents[0]
+
+    def iter_batches(self, n: int) -> Iterable[List[Any]]:
+        """Yields the items in lists of up to n, without loading more than a batch at a time"""
+        if n < 1:
+            raise ValueError(f"Batch size must be positive, got {n}")
+        items = iter(self.__items)
+        batch = list(islice(items, n))
+        while batch:
+            yield batch
+            batch = list(islice(items, n))
+
+    def __classify_path(self):
+        """ Classify a path as a file or directory"""
+        if self.path:
+            return (self.path.is_file(), self.path.is_dir())
+        else:
+            log.debug("No path supplied")
+            return (False, False)
+
+    def __load_items(self) -> Iterable[Dict]:
+        """
+        Loads dicts from a path (file or directory) or a List[dict]
+        Removes disabled items before returning
+        """
+
+        if self.path and self.is_path:
+            log.debug("Loading objects from single paths")
+            if self.workers and self.path.suffix in JSONL_SUFFIXES:
+                items = self.__load_ranges()
+            else:
+                items = self.__load_documents([self.path], skip_errors=False)
+
+        elif self.is_dir:
+            log.debug("Loading objects from directory")
+            items = self.load_directory()
+
+        elif self.__dicts:
+            log.debug("Loading supplied objects")
+            items = self.__compact(chain(self.__dicts))
+
+        else:
+            e = "No objects found to load"
+            log.warning(e)
+            raise ValueError(e)
+
+        return items if self.load_disabled else self.remove_disabled_items(items)
+
+    def __compact(self, items: Iterable[Dict]) -> Iterable[Any]:
+        return items if self.__records is None else map(self.__records, items)
+
+    def remove_disabled_items(self, items) -> Iterable[Dict]:
+        """
+        Yields only items which are not flagged as disabled via self.disabled_key
+        """
+        if items:
+            n = 0
+            n_removed = 0
+            for n, item in enumerate(items, start=1):
+                if not item.get(self.disabled_key, False):
+                    yield item
+                else:
+                    n_removed += 1
+            else:
+                log.info(f"{n_removed} out of {n} items are disabled")
+        else:
+            log.warning("No items found or supplied to Dicts")
+
+    @staticmethod
+    def load_file(
+        path: Path, cache: Optional[ParseCache] = None, parser: Optional[str] = None
+    ) -> Iterable[Dict]:
+        """
+        Load a single yaml or json file as dict.
+        Location of path is also stored in the in PATH_KEY
+        If a cache is given, the parsed documents are stored in or read from it
+        The yaml parser defaults to parsers.get_default_parser()
+        """
+        parser = parser or parsers.get_default_parser()
+        contents, _ = _contents(path, cache, parser)
+        yield from _with_path(contents, path.as_posix())
+
+    def invalidate_cache(self, path: Optional[Path] = None) -> None:
+        """Drops the cached documents of a file, or all of them if no path is given"""
+        if self.cache is not None:
+            self.cache.invalidate(path)
+
+    def load_directory(self) -> Iterable[Dict]:
+        """
+        Load all json and yaml files from a directory.
+        With self.workers set, files are parsed in a pool of
+        threads or processes, and yielded in the same order.
+        Only a "process" pool parses files in parallel, threads share the GIL.
+        """
+        if self.path:
+            files = self.__scan(self.path.as_posix()) if self.is_dir else iter([self.path])
+        else:
+            log.error("Tried to load a directory without a supplied path")
+
+        yield from self.__load_documents(files, self.skip_errors)
+
+    def __load_files(self, files: Iterable[Path]) -> Iterable[Loaded]:
+        if self.workers:
+            return self.__load_parallel(files)
+        return map(partial(_load_path, cache=self.cache, parser=self.parser), files)
+
+    def __load_documents(self, files: Iterable[Path], skip_errors: bool) -> Iterable[Dict]:
+        """
+        Yields the documents of the files, remembering them per file unless lazy,
+        and records their stats in self.load_stats
+        """
+        start = time.perf_counter()
+        try:
+            if self.lazy and not self.workers:
+                for path in files:
+                    yield from self.__stream_documents(path, skip_errors)
+                return
+
+            for path, source, documents, error, stats in self.__load_files(files):
+                if self.__records is not None:
+                    documents = list(map(self.__records, documents))
+                if not self.lazy:
+                    self.__sources[path.as_posix()] = (source, documents)
+                self.load_stats.files.append(stats._replace(disabled=self.__disabled(documents)))
+
+                yield from documents
+
+                if error is not None:
+                    self.__handle_error(path, error, skip_errors)
+        finally:
+            self.__finish_stats(start)
+
+    def __stream_documents(self, path: Path, skip_errors: bool) -> Iterable[Dict]:
+        """Yields the documents of a file as they are parsed, recording its stats after"""
+        parser = self.parser or parsers.get_default_parser()
+        source, error, cache_hit = None, None, False
+        count = disabled = 0
+        start = time.perf_counter()
+        try:
+            source = fingerprint(path)
+            contents, cache_hit = _contents(path, self.cache, parser)
+            for document in self.__compact(_with_path(contents, path.as_posix())):
+                count += 1
+                disabled += self.__disabled([document])
+                yield document
+        except Exception as e:
+            error = e
+
+        self.load_stats.files.append(
+            FileStats(
+                path=path.as_posix(),
+                seconds=time.perf_counter() - start,
+                bytes=source[1] if source else 0,
+                documents=count,
+                disabled=disabled,
+                error=None if error is None else f"{type(error).__name__}: {error}",
+                cache_hit=cache_hit,
+            )
+        )
+        if error is not None:
+            self.__handle_error(path, error, skip_errors)
+
+    def __disabled(self, documents: List[Dict]) -> int:
+        if self.load_disabled:
+            return 0
+        return sum(1 for d in documents if d.get(self.disabled_key, False))
+
+    def __finish_stats(self, start: float) -> None:
+        self.load_stats.seconds += time.perf_counter() - start
+        log.debug(f"Loaded {self.path}: {self.load_stats}")
+        if self.stats_hook is not None:
+            self.stats_hook(self.load_stats)
+
+    @staticmethod
+    def __handle_error(path: Path, error: Exception, skip_errors: bool) -> None:
+        if not skip_errors:
+            raise error
+        log.warning(f"Could not load {path}: {error}")
+        log.exception(error, exc_info=error)
+
+    def __scan(
+        self, directory: str, prefix: str = "", visited: Optional[set] = None
+    ) -> Iterable[Path]:
+        """
+        Yields the loadable files of a directory in name order, descending into
+        subdirectories if self.recursive. Entry types come from the directory
+        listing, so most entries cost no extra syscalls.
+
+        Patterns are matched against both an entry's name and its path relative
+        to self.path. Excluded directories are not descended into.
+        """
+        visited = visited if visited is not None else {os.path.realpath(directory)}
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+
+        for entry in entries:
+            relative = prefix + entry.name
+            if self.exclude and _matches(entry.name, relative, self.exclude):
+                log.debug(f"Excluded path: {entry.path}")
+                continue
+
+            if entry.is_dir():
+                if not self.recursive:
+                    continue
+                real = os.path.realpath(entry.path) if entry.is_symlink() else entry.path
+                if real in visited:
+                    log.debug(f"Directory already loaded: {entry.path}")
+                    continue
+                visited.add(real)
+                yield from self.__scan(real, relative + "/", visited)
+                continue
+
+            if not entry.is_file():
+                log.debug(f"Path is not a file: {entry.path}")
+                continue
+
+            if os.path.splitext(entry.name)[1] not in LOADABLE_SUFFIXES:
+                log.debug(f"Suffix not loadable for path {entry.path}")
+                continue
+
+            if self.include and not _matches(entry.name, relative, self.include):
+                continue
+
+            path = Path(entry.path)
+            yield path.resolve() if entry.is_symlink() else path
+
+    def __load_ranges(self) -> Iterable[Dict]:
+        """Loads a JSON Lines file in a pool of self.workers, each parsing a byte range"""
+        start = time.perf_counter()
+        source = fingerprint(self.path)
+        n = max(self.workers * TASKS_PER_WORKER, source[1] // JSONL_RANGE_BYTES)
+        load = partial(_load_range, self.path)
+        documents = []
+        count = disabled = 0
+
+        pool = EXECUTORS[self.executor](max_workers=self.workers)
+        try:
+            window = self.workers * TASKS_PER_WORKER
+            for records in _ordered_map(pool, load, JsonLines(self.path).split(n), window):
+                if self.__records is not None:
+                    records = list(map(self.__records, records))
+                if not self.lazy:
+                    documents.extend(records)
+                count += len(records)
+                disabled += self.__disabled(records)
+                yield from records
+        finally:
+            pool.shutdown(wait=False)
+            stats = FileStats(
+                path=self.path.as_posix(),
+                seconds=time.perf_counter() - start,
+                bytes=source[1],
+                documents=count,
+                disabled=disabled,
+            )
+            self.load_stats.files.append(stats)
+            self.__finish_stats(start)
+
+        if not self.lazy:
+            self.__sources[self.path.as_posix()] = (source, documents)
+
+    def __load_parallel(self, files: Iterable[Path]) -> Iterable[Loaded]:
+        """Loads files in a pool of self.workers, keeping their order"""
+        log.debug(f"Loading files with {self.workers} {self.executor} workers")
+        load = partial(_load_path, cache=self.cache, parser=self.parser)
+        pool = EXECUTORS[self.executor](max_workers=self.workers)
+        try:
+            yield from _ordered_map(pool, load, files, self.workers * TASKS_PER_WORKER)
+        finally:
+            # An abandoned generator may be closed from any thread,
+            # including one of the pool's, so don't wait for the workers here
+            pool.shutdown(wait=False)
+
+    def items_as(
+        self,
+        f: Callable[[Dict], Any],
+        workers: Optional[int] = None,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        executor: str = DEFAULT_EXECUTOR,
+    ):
+        """
+        Transform the Dicts to a class or by a function.
+        With workers, f runs in a pool of "thread" or "process" workers on
+        chunks of chunksize items, and raises ItemError naming the failing
+        item's path. Results keep the order of the items, and are computed
+        only a few chunks ahead of the items being read.
+        """
+        return self.__apply(map, f, False, workers, chunksize, executor)
+
+    def items_as_records(self):
+        """
+        Converts the items to compact, read-only Records, which share their
+        key names and source paths with other records of the same shape.
+        Records support mapping access, such as .get, and Record.to_dict()
+        """
+        return self.items_as(RecordFactory(PATH_KEY))
+
+    def to_columns(self, fields: Optional[List[str]] = None):
+        """
+        Returns a columnar copy of the items, of the given fields or every key found,
+        which can be filtered with column expressions and turned back into dicts:
+
+            from revlibs.dicts.columns import col
+            loader.to_columns().filter(col("size") > 10).to_dicts()
+
+        Loads all items of a lazy Dicts.
+        """
+        # Imported here so that NumPy is only imported when columns are used
+        from revlibs.dicts.columns import Columns
+
+        items = self.__items if self.lazy else self.__materialize()
+        return Columns.from_items(items, fields)
+
+    def filter(
+        self,
+        predicate: Callable[[Any], bool],
+        workers: Optional[int] = None,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        executor: str = DEFAULT_EXECUTOR,
+    ):
+        """Filter the Dicts according to some predicate, in a pool of workers as in items_as"""
+        return self.__apply(filter, predicate, True, workers, chunksize, executor)
+
+    def validate(self, schema: Union[Mapping, Validator], fail_fast: bool = True):
+        """
+        Checks the items against a schema, compiled once with schema.compile_schema,
+        as they are iterated over. Keys missing from an item are set to their defaults.
+
+        Args:
+            schema: A schema, or a validator from schema.compile_schema
+            fail_fast: Raise ValidationError for the first invalid item. Otherwise
+                       invalid items are dropped, and their errors logged and kept
+                       in self.validation_errors
+        """
+        validator = schema if callable(schema) else compile_schema(schema)
+        transform = partial(_validated, fail_fast=fail_fast, errors=self.validation_errors)
+        return self.__apply(transform, validator)
+
+    def __apply(
+        self,
+        transform: Callable,
+        f: Callable[[Any], Any],
+        keep: bool = False,
+        workers: Optional[int] = None,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        executor: str = DEFAULT_EXECUTOR,
+    ):
+        """Adds a map or filter step to the items, and to the pipeline replayed on refresh"""
+        if workers:
+            if executor not in EXECUTORS:
+                raise ValueError(f"Unknown executor {executor}, expected one of {list(EXECUTORS)}")
+            if chunksize < 1:
+                raise ValueError(f"Chunk size must be positive, got {chunksize}")
+            transform = partial(
+                _apply_parallel, keep=keep, workers=workers, chunksize=chunksize, executor=executor
+            )
+
+        self.__items = transform(f, self.__items)
+        self.__pipeline.append((transform, f))
+        self.__indexes = {}
+        return self
+
+    def __enabled(self, documents: List[Dict]) -> List[Dict]:
+        if self.load_disabled:
+            return documents
+        return [d for d in documents if not d.get(self.disabled_key, False)]
+
+    def refresh(self) -> DictsDiff:
+        """
+        Reloads the files that were added, changed or removed since the last load,
+        going by their mtime, size and inode. The items are rebuilt by replaying
+        items_as and filter over all documents, and any indexes are rebuilt.
+
+        Returns:
+            The enabled documents of added, removed and modified files,
+            keyed by PATH_KEY
+        """
+        if self.lazy or not self.path:
+            raise ValueError("Only Dicts eagerly loaded from a path can be refreshed")
+
+        with self.__refresh_lock:
+            files = self.__files()
+            previous = self.__sources
+            current: Dict[str, Tuple[Optional[Fingerprint], List[Dict]]] = {}
+            stale = []
+            for path in files:
+                key = path.as_posix()
+                try:
+                    source = fingerprint(path)
+                except FileNotFoundError:
+                    continue
+
+                if key in previous and previous[key][0] == source:
+                    current[key] = previous[key]
+                else:
+                    # Reserves the file's place, keeping the load order
+                    current[key] = (None, [])
+                    stale.append(path)
+
+            for path, source, documents, error, _ in self.__load_files(stale):
+                if self.__records is not None:
+                    documents = list(map(self.__records, documents))
+                current[path.as_posix()] = (source, documents)
+                if error is not None:
+                    self.__handle_error(path, error, self.skip_errors and self.is_dir)
+
+            added, modified = {}, {}
+            for path in stale:
+                key = path.as_posix()
+                documents = self.__enabled(current[key][1])
+                if key not in previous:
+                    added[key] = documents
+                elif documents != self.__enabled(previous[key][1]):
+                    modified[key] = documents
+            removed = {
+                key: self.__enabled(documents)
+                for key, (_, documents) in previous.items()
+                if key not in current
+            }
+
+            self.__sources = current
+            if stale or removed:
+                self.__rebuild()
+
+        diff = DictsDiff(added=added, removed=removed, modified=modified)
+        if diff:
+            log.info(
+                f"Refreshed {self.path}: {len(added)} files added, "
+                f"{len(removed)} removed, {len(modified)} modified"
+            )
+        return diff
+
+    def __files(self) -> List[Path]:
+        """The loadable files under self.path now"""
+        if self.is_dir:
+            return list(self.__scan(self.path.as_posix()))
+        return [self.path] if self.path.is_file() else []
+
+    def __rebuild(self) -> None:
+        """Rebuilds the items and indexes from the loaded documents"""
+        items = chain.from_iterable(documents for _, documents in self.__sources.values())
+        if not self.load_disabled:
+            items = self.remove_disabled_items(items)
+        # Replaying validate steps finds the errors again
+        del self.validation_errors[:]
+        for transform, f in self.__pipeline:
+            items = transform(f, items)
+
+        indexes = list(self.__indexes)
+        self.__items = list(items)
+        self.__indexes = {}
+        for fields in indexes:
+            self.index(*fields)
+
+    def watch(
+        self,
+        interval: float = DEFAULT_WATCH_INTERVAL,
+        callback: Optional[Callable[[DictsDiff], None]] = None,
+    ) -> Watcher:
+        """
+        Starts a daemon thread calling Dicts.refresh every interval seconds,
+        and the callback with the diff whenever something changed.
+        Call Watcher.stop() to stop it.
+        """
+        watcher = Watcher(self, interval=interval, callback=callback)
+        watcher.start()
+        return watcher
+
+    def save_snapshot(self, path: Path) -> Path:
+        """
+        Writes the items, and a manifest of the files they were loaded from,
+        to a single binary file which Dicts.load_snapshot reads back.
+        The items must be picklable, which those made by items_as may not be.
+        """
+        if self.lazy:
+            raise ValueError("Only eagerly loaded Dicts can be snapshotted")
+
+        manifest = [
+            (key, source, len(self.__enabled(documents)), _content_key(Path(key), source))
+            for key, (source, documents) in self.__sources.items()
+        ]
+        snapshot = {
+            "path": self.path.as_posix() if self.path else None,
+            "options": {
+                "skip_errors": self.skip_errors,
+                "load_disabled": self.load_disabled,
+                "disabled_key": self.disabled_key,
+                "parser": self.parser,
+                "recursive": self.recursive,
+                "include": self.include,
+                "exclude": self.exclude,
+                "compact": self.__records is not None,
+            },
+            "manifest": manifest,
+            # Items changed by items_as or filter no longer line up with their files
+            "by_file": not self.__pipeline,
+            "items": self.__materialize(),
+        }
+        return write_snapshot(path, snapshot)
+
+    @staticmethod
+    def load_snapshot(path: Path, verify: bool = False, **kwargs):
+        """
+        Loads the items written by Dicts.save_snapshot, without parsing any files.
+        The result can be refreshed as if it had just been loaded, unless
+        items_as or filter had been applied before the snapshot was taken.
+
+        Args:
+            path: The snapshot file
+            verify: Checks the snapshot's files against its manifest, and loads them
+                    with Dicts.from_path instead if any was added, removed or changed.
+                    Files are compared by size and content hash, so copies match
+            kwargs: Options for Dicts.from_path on a fallback load, such as workers
+
+        Raises:
+            ValueError: If a verified snapshot of transformed items is stale, as
+                        the transformed items can't be loaded again from the files
+        """
+        snapshot = read_snapshot(path)
+        options = snapshot["options"]
+        items = snapshot["items"]
+
+        # Disabled items were already removed, and an iterator is never empty
+        restored = Dicts(dicts=iter(items), load_disabled=True, parser=options["parser"])
+        restored.skip_errors = options["skip_errors"]
+        restored.load_disabled = options["load_disabled"]
+        restored.disabled_key = options["disabled_key"]
+        restored.recursive = options["recursive"]
+        restored.include = options["include"]
+        restored.exclude = options["exclude"]
+        if options["compact"]:
+            restored.__records = RecordFactory(PATH_KEY)
+
+        source_path = snapshot["path"]
+        if source_path:
+            restored.path = Path(source_path)
+            restored.is_path, restored.is_dir = restored.__classify_path()
+
+        manifest = [(key, source, n) for key, source, n, *_ in snapshot["manifest"]]
+        if verify and source_path:
+            current = restored.__verify_manifest(snapshot["manifest"])
+            if current is None:
+                if not snapshot["by_file"]:
+                    # Loading the files again would lose the items_as and filter steps
+                    raise ValueError(f"Snapshot {path} of transformed items is stale")
+                log.info(f"Snapshot {path} is stale, loading {source_path}")
+                return Dicts.from_path(Path(source_path), **{**options, **kwargs})
+            # Copies of the files are refreshed against their own fingerprints
+            manifest = [(key, source, n) for (key, _, n), source in zip(manifest, current)]
+
+        if snapshot["by_file"]:
+            start = 0
+            for key, source, n in manifest:
+                restored.__sources[key] = (source, items[start : start + n])
+                start += n
+        else:
+            # Refreshing would drop the items_as and filter steps
+            restored.path = None
+            restored.is_path = restored.is_dir = False
+
+        return restored
+
+    def __verify_manifest(self, manifest: List[tuple]) -> Optional[List[Fingerprint]]:
+        """
+        The fingerprints of the files under self.path if they are those of the
+        manifest, unchanged, or None. Files with another fingerprint are compared
+        by size and content hash, so that copies of the files match.
+        """
+        files = [path.as_posix() for path in self.__files()]
+        if files != [key for key, *_ in manifest]:
+            return None
+
+        current = []
+        try:
+            for key, source, _, *content in manifest:
+                found = fingerprint(Path(key))
+                if found != source:
+                    # Snapshots written before content keys were recorded have none
+                    stored = content[0] if content else None
+                    if stored is None or _content_key(Path(key), found) != stored:
+                        return None
+                current.append(found)
+        except FileNotFoundError:
+            return None
+        return current
+
+    def __materialize(self) -> List[Any]:
+        """Loads pending items into a list, so that they can be read more than once"""
+        if not isinstance(self.__items, list):
+            self.__items = list(self.__items)
+        return self.__items
+
+    def index(self, *fields: str):
+        """
+        Builds a hash index of the items on one or more dictionary keys, which
+        Dicts.where and Dicts.get_by use for lookups on those keys.
+        Indexes are dropped when filter or items_as change the items,
+        and building one loads all items of a lazy Dicts.
+        """
+        if not fields:
+            raise ValueError("An index needs at least one field")
+
+        index: Dict[Hashable, List[Any]] = {}
+        for item in self.__materialize():
+            k = tuple(item.get(field) for field in fields)
+            group = index.get(k)
+            if group is None:
+                index[k] = [item]
+            else:
+                group.append(item)
+
+        self.__indexes[fields] = index
+        return self
+
+    def where(self, **equalities: Any) -> List[Any]:
+        """
+        Returns the items whose values equal all of the given ones, for example
+        where(flavour="postgres", dsn="localhost:5432").
+        Uses the index covering the most of the given keys, if there is one.
+        """
+        covering = [fields for fields in self.__indexes if set(fields) <= set(equalities)]
+        if covering:
+            fields = max(covering, key=len)
+            k = tuple(equalities[field] for field in fields)
+            candidates = self.__indexes[fields].get(k, [])
+            remaining = {f: v for f, v in equalities.items() if f not in fields}
+        else:
+            candidates = self.__materialize()
+            remaining = equalities
+
+        return [
+            item
+            for item in candidates
+            if all(item.get(field) == value for field, value in remaining.items())
+        ]
+
+    def get_by(self, field: str, value: Any) -> Any:
+        """
+        Returns the single item whose field equals value.
+        Raises a KeyError if there is none, and a ValueError if there are several.
+        """
+        matches = self.where(**{field: value})
+        if not matches:
+            raise KeyError(f"No item with {field}={value}")
+        if len(matches) > 1:
+            msg = f"Key {value} has {len(matches)} elements"
+            log.error(msg)
+            raise ValueError(msg)
+        return matches[0]
+
+    def __make_callable(self, key: Key, default: Hashable) -> Callable[[Dict], Hashable]:
+        """Convenience function to convert a string to a dictionary accessor function
+
+        Args:
+            key: A grouping function, a dictionary key name that will be converted
+                 to an accessor, or a tuple of key names for a composite key
+
+        Returns:
+            A function by which a dictionary can be grouped
+        """
+        if isinstance(key, str):
+            return lambda d: d.get(key, default)
+        elif isinstance(key, (tuple, list)):
+            fields = tuple(key)
+            return lambda d: tuple(d.get(field, default) for field in fields)
+        else:
+            return key
+
+    def __group(self, key: Key, default: Hashable, unique: bool) -> Dict[Hashable, List[Any]]:
+        """
+        Groups the items by key in a single pass, keeping the order of the items
+        in a group. If unique, fails on the first key that has a second element.
+        """
+        self.keyed = True
+        callable_key = self.__make_callable(key, default)
+        groups: Dict[Hashable, List[Any]] = {}
+        for item in self.__items:
+            k = callable_key(item)
+            group = groups.get(k)
+            if group is None:
+                groups[k] = [item]
+            elif unique:
+                msg = f"Key {k} has more than one element"
+                log.error(msg)
+                raise ValueError(msg)
+            else:
+                group.append(item)
+        return groups
+
+    @staticmethod
+    def __sort_keys(groups: Dict[Hashable, Any]) -> Dict[Hashable, Any]:
+        """Orders groups by key, keeping insertion order if the keys cannot be compared"""
+        try:
+            return {k: groups[k] for k in sorted(groups)}
+        except TypeError as e:
+            log.debug(f"Keys cannot be sorted, keeping insertion order: {e}")
+            return groups
+
+    def __key_by(
+        self, key: Key, default: Hashable, map: bool, sort_keys: bool
+    ) -> Dict[Hashable, List[Any]]:
+        groups = self.__group(key, default, unique=map)
+        for k, items in groups.items():
+            n = len(items)
+            if n > 1:
+                log.info(f"Key {k} has {n} elements")
+        return self.__sort_keys(groups) if sort_keys else groups
+
+    def key_by(
+        self, key: Key, default: Hashable, map: bool = False, sort_keys: bool = True
+    ) -> Dict[Hashable, List[Any]]:
+        """
+        Keys a list of dicts by a function or dictionary key.
+        If the key should result in a map (a 1-1 mapping) and does not,
+        key_by will throw an error
+
+        Args:
+            key: To be converted to a grouper function,
+                 a tuple of dictionary keys groups by all of them
+            default: The default grouping if the group function returns None
+                     for an element
+            map: If the key_by should result in a map (i.e., a 1-1 mapping )
+            sort_keys: Order the result by key, otherwise keys keep the order
+                       in which they were first seen
+
+        Returns:
+            A dictionary
+        """
+        return self.__key_by(key=key, default=default, map=map, sort_keys=sort_keys)
+
+    def key_by_file(self, sort_keys: bool = True) -> Dict[Hashable, List[Any]]:
+        """Groups the supplied dicts by filepath"""
+        return self.__key_by(key=PATH_KEY, default=DEFAULT_PATH_KEY, map=False, sort_keys=sort_keys)
+
+    def map_by(self, key: Key, default: Hashable, sort_keys: bool = True) -> Dict[Hashable, Any]:
+        """Groups a list of dicts into key-value pairs of unique key to a
+        single element
+
+        Args:
+            key: A dictionary key or tuple of keys to group by
+            default: The default group if the dictionary key does not exist
+                     in a dict
+            sort_keys: Order the result by key, otherwise keys keep the order
+                       in which they were first seen
+
+        Returns:
+            A map of unique values in some config to the config.
+            For example, for a directory containing config files {path: config}
+        """
+        grouped_items = self.__key_by(key=key, default=default, map=True, sort_keys=sort_keys)
+        return {k: head for (k, (head, *_)) in grouped_items.items()}
+
+    def join(
+        self,
+        other: Union["Dicts", Iterable[Any]],
+        on: Key,
+        how: str = INNER,
+        other_on: Optional[Key] = None,
+    ) -> "Dicts":
+        """
+        Joins the items with those of another Dicts by key, in linear time.
+
+        The smaller side, when both are loaded, is built into a hash table, and
+        the other side is streamed past it as the result is iterated over. Left
+        and anti joins always build on `other`. Keys that are None, or composite
+        keys holding None, never match.
+
+        Args:
+            other: A Dicts or iterable of items to join with
+            on: A function, dictionary key or tuple of keys to join on
+            how: One of JOINS
+                 "inner" yields (item, other_item) for every matching pair
+                 "left" also yields (item, None) for items without a match
+                 "anti" yields the items without a match
+            other_on: The key of the other items, if it differs from `on`
+
+        Returns:
+            A lazy Dicts of the joined items
+        """
+        if how not in JOINS:
+            raise ValueError(f"Unknown join {how}, expected one of {list(JOINS)}")
+
+        left_key = self.__make_callable(on, None)
+        right_key = self.__make_callable(on if other_on is None else other_on, None)
+        right = other.items if isinstance(other, Dicts) else other
+        left = self.__items
+
+        def sized(items):
+            return len(items) if isinstance(items, list) else None
+
+        if how == INNER and sized(left) is not None:
+            if sized(right) is None or sized(left) < sized(right):
+                # Build on the left, and flip the pairs back
+                pairs = _hash_join(right, left, right_key, left_key, INNER)
+                return Dicts.from_dicts(
+                    ((l, r) for (r, l) in pairs), load_disabled=True, lazy=True
+                )
+
+        joined = _hash_join(left, right, left_key, right_key, how)
+        return Dicts.from_dicts(joined, load_disabled=True, lazy=True)
+
+    def reduce_by(
+        self, key: Key, default: Hashable, reducer: Callable[[Any, Any], Any], initial: Any
+    ) -> Dict[Hashable, Any]:
+        """
+        Groups the items by key, folding each group into a single value as the
+        items stream past, so that the groups themselves are never held in memory.
+
+        Args:
+            key: A grouping function, dictionary key or tuple of keys
+            default: The default group if the dictionary key does not exist
+            reducer: Combines the value so far for a key with the next item,
+                     it should return a new value rather than mutate `initial`
+            initial: The value each group starts from
+
+        For example, counting animals by diet
+            Dicts.from_dicts(data).reduce_by("diet", "_", lambda n, _: n + 1, 0)
+        """
+        self.keyed = True
+        callable_key = self.__make_callable(key, default)
+        reduced: Dict[Hashable, Any] = {}
+        for item in self.__items:
+            k = callable_key(item)
+            reduced[k] = reducer(reduced.get(k, initial), item)
+        return reduced
+
+    @staticmethod
+    def from_path(
+        path: Path,
+        skip_errors: bool = False,
+        load_disabled: bool = False,
+        disabled_key: str = DISABLED_KEY,
+        workers: Optional[int] = None,
+        executor: str = DEFAULT_EXECUTOR,
+        cache: Union[bool, ParseCache] = False,
+        parser: Optional[str] = None,
+        lazy: bool = False,
+        recursive: bool = False,
+        include: Union[str, Iterable[str], None] = None,
+        exclude: Union[str, Iterable[str], None] = None,
+        compact: bool = False,
+        stats_hook: Optional[Callable[[LoadStats], None]] = None,
+    ):
+        return Dicts(
+            path=path,
+            skip_errors=skip_errors,
+            load_disabled=load_disabled,
+            disabled_key=disabled_key,
+            workers=workers,
+            executor=executor,
+            cache=cache,
+            parser=parser,
+            lazy=lazy,
+            recursive=recursive,
+            include=include,
+            exclude=exclude,
+            compact=compact,
+            stats_hook=stats_hook,
+        )
+
+    @staticmethod
+    def stream(path: Path, **kwargs):
+        """Dicts.from_path, parsing files only as the items are iterated over"""
+        return Dicts.from_path(path, lazy=True, **kwargs)
+
+    @staticmethod
+    def from_dicts(
+        dicts: Iterable[Dict],
+        skip_errors: bool = False,
+        load_disabled: bool = False,
+        disabled_key: str = DISABLED_KEY,
+        lazy: bool = False,
+        compact: bool = False,
+    ):
+        return Dicts(
+            dicts=dicts,
+            skip_errors=skip_errors,
+            load_disabled=load_disabled,
+            disabled_key=disabled_key,
+            lazy=lazy,
+            compact=compact,
+        )
@@ -0,0 +1,29 @@
+"""Definitions of exceptions raised by dicts library"""
+from typing import List, Optional
+
+
+class ItemError(Exception):
+    """Raised when a function applied to an item fails, naming the item's source path"""
+
+    def __init__(self, path: Optional[str], reason: str) -> None:
+        self.path = path
+        self.reason = reason
+        self.message = f"Could not process item from {path}: {reason}"
+        super().__init__(self.message)
+
+    def __reduce__(self):
+        # Rebuilt from its arguments, so that it can be raised across processes
+        return (type(self), (self.path, self.reason))
+
+
+class ValidationError(ItemError):
+    """Raised when an item does not match a schema, with every error found in it"""
+
+    def __init__(self, path: Optional[str], errors: List[str]) -> None:
+        self.errors = errors
+        super().__init__(path, "; ".join(errors))
+        self.message = f"Invalid item from {path}: {self.reason}"
+        self.args = (self.message,)
+
+    def __reduce__(self):
+        return (type(self), (self.path, self.errors))
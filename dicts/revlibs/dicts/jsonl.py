@@ -0,0 +1,178 @@
+"""Memory mapped JSON Lines (NDJSON) files, with an optional index of line offsets"""
+from typing import Any, Iterable, List, Optional, Tuple, Union
+
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+from array import array
+from pathlib import Path
+
+
+log = logging.getLogger(__name__)
+
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+INDEX_SUFFIX = ".idx"
+
+# An index file starts with a magic, and the size and mtime of the file it indexes
+_INDEX_MAGIC = b"RDJI0001"
+_INDEX_HEADER = struct.Struct("<8sQq")
+# Offsets are stored as unsigned 64 bit integers
+_OFFSET_TYPECODE = "Q"
+
+_NON_BLANK = re.compile(rb"\S")
+
+
+class JsonLines:
+    """
+    A JSON Lines file, one JSON value per line, read through a memory map so
+    that records are parsed one at a time without reading the whole file.
+
+    The byte offsets of the lines can be indexed, which allows len(), random
+    access and slicing, and be saved next to the file as `<path>.idx`.
+    Blank lines are skipped and do not count as records.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.__file = None
+        self.__map: Optional[Union[mmap.mmap, bytes]] = None
+        self.__offsets: Optional[array] = None
+
+    def __repr__(self):
+        return f"JsonLines({self.path.as_posix()!r})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        """Releases the memory map used for random access"""
+        if isinstance(self.__map, mmap.mmap):
+            self.__map.close()
+        if self.__file is not None:
+            self.__file.close()
+        self.__file = self.__map = None
+
+    @staticmethod
+    def __open_map(f) -> Union[mmap.mmap, bytes]:
+        # Empty files cannot be memory mapped
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def __mapped(self) -> Union[mmap.mmap, bytes]:
+        if self.__map is None:
+            self.__file = self.path.open("rb")
+            self.__map = self.__open_map(self.__file)
+        return self.__map
+
+    def __iter__(self) -> Iterable[Any]:
+        return self.iter_range()
+
+    def iter_range(self, start: int = 0, end: Optional[int] = None) -> Iterable[Any]:
+        """
+        Yields the records of the lines which start within the byte range [start, end).
+        Ranges that split the file, such as those from JsonLines.split, yield
+        every record exactly once between them.
+        """
+        with self.path.open("rb") as f:
+            data = self.__open_map(f)
+            try:
+                size = len(data)
+                end = size if end is None else min(end, size)
+                for line_start, line_end in _lines(data, _line_start(data, start), end):
+                    yield json.loads(data[line_start:line_end])
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+
+    def split(self, n: int) -> List[Tuple[int, int]]:
+        """Splits the file into n byte ranges, to be read with iter_range by separate workers"""
+        size = self.path.stat().st_size
+        bounds = [size * i // n for i in range(n + 1)]
+        return list(zip(bounds, bounds[1:]))
+
+    def build_index(self) -> array:
+        """Builds the index of line offsets by scanning the file for newlines"""
+        data = self.__mapped
+        offsets = (start for start, _ in _lines(data, 0, len(data)))
+        self.__offsets = array(_OFFSET_TYPECODE, offsets)
+        return self.__offsets
+
+    @property
+    def index_path(self) -> Path:
+        return self.path.with_name(self.path.name + INDEX_SUFFIX)
+
+    def __header(self) -> bytes:
+        stat = self.path.stat()
+        return _INDEX_HEADER.pack(_INDEX_MAGIC, stat.st_size, stat.st_mtime_ns)
+
+    def save_index(self) -> Path:
+        """Writes the index next to the file, building it first if needed"""
+        offsets = self.index()
+        with self.index_path.open("wb") as f:
+            f.write(self.__header())
+            offsets.tofile(f)
+        return self.index_path
+
+    def load_index(self) -> Optional[array]:
+        """Reads a saved index, or returns None if there is none or the file changed since"""
+        try:
+            with self.index_path.open("rb") as f:
+                if f.read(_INDEX_HEADER.size) != self.__header():
+                    log.debug(f"Index of {self.path} is stale")
+                    return None
+                offsets = array(_OFFSET_TYPECODE)
+                offsets.frombytes(f.read())
+        except FileNotFoundError:
+            return None
+
+        self.__offsets = offsets
+        return offsets
+
+    def index(self) -> array:
+        """Returns the line offsets, from a saved index if it is up to date"""
+        if self.__offsets is None and self.load_index() is None:
+            self.build_index()
+        return self.__offsets
+
+    def __len__(self):
+        return len(self.index())
+
+    def __record(self, offset: int) -> Any:
+        data = self.__mapped
+        end = data.find(b"\n", offset)
+        return json.loads(data[offset : end if end != -1 else len(data)])
+
+    def __getitem__(self, i: Union[int, slice]) -> Any:
+        offsets = self.index()
+        if isinstance(i, slice):
+            return [self.__record(offset) for offset in offsets[i]]
+        return self.__record(offsets[i])
+
+
+def _line_start(data: Union[mmap.mmap, bytes], position: int) -> int:
+    """The offset of the first line starting at or after position"""
+    if position <= 0:
+        return 0
+    if data[position - 1 : position] == b"\n":
+        return position
+    newline = data.find(b"\n", position)
+    return len(data) if newline == -1 else newline + 1
+
+
+def _lines(data: Union[mmap.mmap, bytes], start: int, end: int) -> Iterable[Tuple[int, int]]:
+    """Yields the (start, end) offsets of the non blank lines starting before end"""
+    size = len(data)
+    while start < end:
+        newline = data.find(b"\n", start)
+        stop = size if newline == -1 else newline
+        if _NON_BLANK.search(data, start, stop):
+            yield (start, stop)
+        start = stop + 1
@@ -0,0 +1,88 @@
+"""
+YAML parser backends
+
+ - "rt": ruamel's round-trip loader, which keeps comments and key order
+   in CommentedMap objects
+ - "safe": ruamel's pure python safe loader, which builds plain dicts
+ - "fast": a safe loader backed by libyaml, through ruamel.yaml.clib or PyYAML,
+   falling back to "safe" when neither is installed
+"""
+from typing import Any, Callable, IO, Iterable, List
+
+import logging
+import threading
+
+from ruamel.yaml import YAML
+from ruamel.yaml.main import CParser
+
+
+log = logging.getLogger(__name__)
+
+ROUND_TRIP = "rt"
+SAFE = "safe"
+FAST = "fast"
+PARSERS = (ROUND_TRIP, SAFE, FAST)
+
+_default_parser = ROUND_TRIP
+
+# ruamel's YAML objects keep parser state between calls,
+# so every thread gets its own instances
+_thread_local = threading.local()
+
+
+def set_default_parser(name: str) -> None:
+    """Sets the parser used by Dicts which are not given one"""
+    global _default_parser
+    _default_parser = validate(name)
+
+
+def get_default_parser() -> str:
+    return _default_parser
+
+
+def validate(name: str) -> str:
+    if name not in PARSERS:
+        raise ValueError(f"Unknown parser {name}, expected one of {list(PARSERS)}")
+    return name
+
+
+def _pyyaml_c_loader() -> Callable[[IO[bytes]], Iterable[Any]]:
+    """Returns a PyYAML libyaml loader, raising ImportError if it is not available"""
+    import yaml as pyyaml
+
+    c_safe_loader = getattr(pyyaml, "CSafeLoader", None)
+    if c_safe_loader is None:
+        raise ImportError("PyYAML is installed without libyaml")
+
+    return lambda stream: pyyaml.load_all(stream, Loader=c_safe_loader)
+
+
+def _create(name: str) -> Callable[[IO[bytes]], Iterable[Any]]:
+    if name == ROUND_TRIP:
+        return YAML().load_all
+    if name == SAFE:
+        return YAML(typ="safe", pure=True).load_all
+
+    if CParser is not None:
+        return YAML(typ="safe").load_all
+    try:
+        return _pyyaml_c_loader()
+    except ImportError:
+        log.info("No libyaml bindings installed, using the pure python safe loader")
+        return _create(SAFE)
+
+
+def load_all(name: str, stream: IO[bytes]) -> List[Any]:
+    """
+    Parses all documents of a yaml stream with the named parser.
+    The stream is parsed before returning, as the thread's parser can't be
+    shared by two streams at once, such as those of interleaved lazy Dicts
+    """
+    loaders = getattr(_thread_local, "loaders", None)
+    if loaders is None:
+        loaders = _thread_local.loaders = {}
+
+    load = loaders.get(name)
+    if load is None:
+        load = loaders[name] = _create(validate(name))
+    return list(load(stream))
@@ -0,0 +1,129 @@
+"""
+Compact, read-only records for large collections of dicts sharing a structure.
+
+A Record is a tuple of its values, and shares the key names with every other
+record of the same shape through a Schema. Nested dicts become records too.
+"""
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Tuple
+
+import sys
+from collections.abc import ItemsView, KeysView, Mapping as MappingABC, ValuesView
+
+
+class Schema:
+    """The key names of a record shape, and the position of each value"""
+
+    __slots__ = ("fields", "positions")
+
+    def __init__(self, fields: Tuple[str, ...]):
+        self.fields = tuple(sys.intern(f) if isinstance(f, str) else f for f in fields)
+        self.positions = {field: i for i, field in enumerate(self.fields)}
+
+    def __repr__(self):
+        return f"Schema{self.fields}"
+
+
+class Record(tuple):
+    """
+    A read-only mapping of a schema's fields to values, stored as a single
+    tuple of (schema, *values) so that a record is one object.
+    Supports the read-only dict interface: [], get, keys, values, items, in, len
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, schema: Schema, values: Iterable[Any]):
+        return tuple.__new__(cls, (schema, *values))
+
+    def __getnewargs__(self):
+        return (self._schema, self._values)
+
+    @property
+    def _schema(self) -> Schema:
+        return tuple.__getitem__(self, 0)
+
+    @property
+    def _values(self) -> Tuple[Any, ...]:
+        return tuple.__getitem__(self, slice(1, None))
+
+    def __getitem__(self, key: Any) -> Any:
+        try:
+            position = tuple.__getitem__(self, 0).positions[key]
+        except KeyError:
+            raise KeyError(key) from None
+        return tuple.__getitem__(self, position + 1)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        position = tuple.__getitem__(self, 0).positions.get(key)
+        return default if position is None else tuple.__getitem__(self, position + 1)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in tuple.__getitem__(self, 0).positions
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._schema.fields)
+
+    def __len__(self) -> int:
+        return tuple.__len__(self) - 1
+
+    def keys(self) -> KeysView:
+        return KeysView(self)
+
+    def values(self) -> ValuesView:
+        return ValuesView(self)
+
+    def items(self) -> ItemsView:
+        return ItemsView(self)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, MappingABC):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __ne__(self, other: Any) -> bool:
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self):
+        return f"Record({self.to_dict()})"
+
+    def to_dict(self) -> Dict[Any, Any]:
+        """Converts the record, and any nested records, back to dicts"""
+        return {
+            field: value.to_dict() if isinstance(value, Record) else value
+            for field, value in zip(self._schema.fields, self._values)
+        }
+
+
+MappingABC.register(Record)
+
+
+class RecordFactory:
+    """
+    Converts dicts to records, inferring a schema for each distinct
+    sequence of keys. The values of path_key, the dicts' source paths,
+    are kept in a table so that records share one copy of each.
+    """
+
+    def __init__(self, path_key: Optional[str] = None):
+        self.path_key = path_key
+        self.schemas: Dict[Tuple[Any, ...], Schema] = {}
+        self.paths: Dict[str, str] = {}
+
+    def __call__(self, item: Mapping) -> Record:
+        fields = tuple(item)
+        schema = self.schemas.get(fields)
+        if schema is None:
+            schema = self.schemas[fields] = Schema(fields)
+
+        values = []
+        for field, value in zip(fields, item.values()):
+            if isinstance(value, MappingABC) and not isinstance(value, Record):
+                value = self(value)
+            elif field == self.path_key:
+                value = self.paths.setdefault(value, value)
+            values.append(value)
+
+        return Record(schema, values)
@@ -0,0 +1,66 @@
+"""Tracking changes to the files a Dicts was loaded from"""
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import logging
+import os
+import threading
+from pathlib import Path
+
+
+log = logging.getLogger(__name__)
+
+# The file's mtime, size and inode
+Fingerprint = Tuple[int, int, int]
+
+DEFAULT_WATCH_INTERVAL = 5.0
+
+
+def fingerprint(path: Path) -> Fingerprint:
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class DictsDiff(NamedTuple):
+    """
+    The documents that changed in a Dicts.refresh, keyed by PATH_KEY.
+    For a modified file, the documents are those it holds now.
+    """
+
+    added: Dict[str, List[Any]]
+    removed: Dict[str, List[Any]]
+    modified: Dict[str, List[Any]]
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.modified)
+
+
+class Watcher(threading.Thread):
+    """Refreshes a Dicts every interval seconds, passing any changes to the callback"""
+
+    def __init__(
+        self,
+        dicts: Any,
+        interval: float = DEFAULT_WATCH_INTERVAL,
+        callback: Optional[Callable[[DictsDiff], None]] = None,
+    ):
+        super().__init__(name=f"dicts-watcher-{dicts.path}", daemon=True)
+        self.dicts = dicts
+        self.interval = interval
+        self.callback = callback
+        self.__stopped = threading.Event()
+
+    def run(self):
+        while not self.__stopped.wait(self.interval):
+            try:
+                diff = self.dicts.refresh()
+                if diff and self.callback:
+                    self.callback(diff)
+            except Exception as e:
+                log.warning(f"Could not refresh dicts from {self.dicts.path}: {e}")
+                log.exception(e)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stops watching, waiting for a refresh in progress to finish"""
+        self.__stopped.set()
+        if self is not threading.current_thread():
+            self.join(timeout)
@@ -0,0 +1,192 @@
+"""
+Declarative schemas for dicts, compiled once into a specialised validator.
+
+A schema maps each key to a spec, or to just a type:
+
+    {
+        "name": {"type": "str", "required": True},
+        "size": {"type": "int", "default": 0},
+        "diet": {"enum": ["meat", "grass"]},
+        "location": {"type": "dict", "schema": {"lat": "float", "lon": "float"}},
+        "tags": {"type": "list", "items": "str"},
+    }
+
+Types are named as in TYPES, or given as the builtin types. Keys without a
+default are optional unless required. Defaults are set on the dicts, copied
+for lists and dicts, so they can't be used with read-only items such as Records.
+
+compile_schema generates the source of a function checking every key in
+turn, so that validating a dict involves no interpretation of the schema.
+"""
+from typing import Any, Callable, Dict, List, Mapping, Tuple
+
+import copy
+import itertools
+from collections.abc import Mapping as MappingABC
+
+
+# The types a key can be checked for, by name
+TYPES: Dict[str, Tuple[type, ...]] = {
+    "str": (str,),
+    "int": (int,),
+    "float": (int, float),
+    "bool": (bool,),
+    "list": (list,),
+    "dict": (MappingABC,),
+    "any": (object,),
+}
+_TYPE_NAMES = {str: "str", int: "int", float: "float", bool: "bool", list: "list", dict: "dict"}
+# Numbers exclude booleans, which are ints in Python
+_NUMBERS = ("int", "float")
+
+SPEC_KEYS = ("type", "required", "default", "enum", "schema", "items")
+
+_MISSING = object()
+
+Validator = Callable[[Any], List[str]]
+
+
+def _spec(spec: Any, label: str) -> Dict[str, Any]:
+    """Normalizes a spec given as a type, and checks its keys and type"""
+    if not isinstance(spec, MappingABC):
+        spec = {"type": spec}
+    unknown = set(spec) - set(SPEC_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown keys {sorted(unknown)} in the schema of {label}")
+
+    spec = dict(spec)
+    kind = spec.get("type", "any")
+    kind = _TYPE_NAMES.get(kind, kind) if isinstance(kind, type) else kind
+    if kind not in TYPES:
+        raise ValueError(f"Unknown type {kind} in the schema of {label}")
+    if "schema" in spec and kind not in ("dict", "any"):
+        raise ValueError(f"A nested schema needs type dict, got {kind} for {label}")
+    if "items" in spec and kind not in ("list", "any"):
+        raise ValueError(f"An items schema needs type list, got {kind} for {label}")
+    spec["type"] = "dict" if "schema" in spec else "list" if "items" in spec else kind
+    return spec
+
+
+def _escape(key: Any) -> str:
+    """A key as part of an f-string literal"""
+    return str(key).replace("{", "{{").replace("}", "}}")
+
+
+class _Compiler:
+    """Generates the lines of a validator function"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.constants: Dict[str, Any] = {"MISSING": _MISSING, "deepcopy": copy.deepcopy}
+        self.__names = itertools.count()
+
+    def name(self, prefix: str) -> str:
+        return f"{prefix}{next(self.__names)}"
+
+    def constant(self, value: Any) -> str:
+        name = self.name("c")
+        self.constants[name] = value
+        return name
+
+    def emit(self, indent: int, line: str) -> None:
+        self.lines.append("    " * indent + line)
+
+    def close(self, indent: int, start: int) -> None:
+        """Ends a block opened before line start, which needs a statement"""
+        if len(self.lines) == start:
+            self.emit(indent, "pass")
+
+    def error(self, indent: int, label: str, message: str) -> None:
+        """Appends an error for label, a template of the key's path, with a message expression"""
+        self.emit(indent, f"errors.append(f{(label + ': ')!r} + {message})")
+
+    def fields(self, schema: Mapping, source: str, prefix: str, indent: int) -> None:
+        if not isinstance(schema, MappingABC):
+            raise ValueError(f"A schema must be a mapping of keys to specs, got {schema!r}")
+        for key, spec in schema.items():
+            label = prefix + _escape(key)
+            self.field(_spec(spec, label), source, key, label, indent)
+
+    def field(self, spec: Dict[str, Any], source: str, key: Any, label: str, indent: int) -> None:
+        value = self.name("v")
+        key_name = repr(key) if isinstance(key, (str, int)) else self.constant(key)
+        self.emit(indent, f"{value} = {source}.get({key_name}, MISSING)")
+        if "default" in spec:
+            default = spec["default"]
+            if isinstance(default, (list, dict)):
+                default = f"deepcopy({self.constant(default)})"
+            else:
+                default = self.constant(default)
+            self.emit(indent, f"if {value} is MISSING:")
+            self.emit(indent + 1, f"{source}[{key_name}] = {default}")
+            self.emit(indent, "else:")
+        elif spec.get("required", False):
+            self.emit(indent, f"if {value} is MISSING:")
+            self.error(indent + 1, label, "'missing required key'")
+            self.emit(indent, "else:")
+        else:
+            self.emit(indent, f"if {value} is not MISSING:")
+
+        start = len(self.lines)
+        self.checks(spec, value, label, indent + 1)
+        self.close(indent + 1, start)
+
+    def checks(self, spec: Dict[str, Any], value: str, label: str, indent: int) -> None:
+        """Checks a value against a spec, descending into nested schemas"""
+        kind = spec["type"]
+        if kind != "any":
+            types = self.constant(TYPES[kind] if len(TYPES[kind]) > 1 else TYPES[kind][0])
+            condition = f"not isinstance({value}, {types})"
+            if kind in _NUMBERS:
+                condition += f" or isinstance({value}, bool)"
+            self.emit(indent, f"if {condition}:")
+            self.error(indent + 1, label, f"'expected {kind}, got ' + type({value}).__name__")
+            self.emit(indent, "else:")
+            start = len(self.lines)
+            self.checks({**spec, "type": "any"}, value, label, indent + 1)
+            if len(self.lines) == start:
+                # Nothing else to check, so no else block
+                self.lines.pop()
+            return
+
+        if "enum" in spec:
+            allowed = list(spec["enum"])
+            try:
+                choices = self.constant(frozenset(allowed))
+            except TypeError:
+                choices = self.constant(tuple(allowed))
+            self.emit(indent, f"if {value} not in {choices}:")
+            self.error(indent + 1, label, f"repr({value}) + {f' is not one of {allowed!r}'!r}")
+
+        if "schema" in spec:
+            self.fields(spec["schema"], value, label + ".", indent)
+
+        if "items" in spec:
+            index, item = self.name("i"), self.name("v")
+            items_spec = _spec(spec["items"], f"{label}[]")
+            self.emit(indent, f"for {index}, {item} in enumerate({value}):")
+            start = len(self.lines)
+            self.checks(items_spec, item, f"{label}[{{{index}}}]", indent + 1)
+            self.close(indent + 1, start)
+
+
+def compile_schema(schema: Mapping) -> Validator:
+    """
+    Compiles a schema into a function returning the errors of a dict,
+    an empty list if it is valid. Raises ValueError for an invalid schema.
+    The generated code is kept in the function's `source` attribute.
+    """
+    compiler = _Compiler()
+    compiler.emit(0, "def validate(d):")
+    compiler.emit(1, "errors = []")
+    compiler.emit(1, "if not isinstance(d, Mapping):")
+    compiler.emit(2, "return ['expected a mapping, got ' + type(d).__name__]")
+    compiler.fields(schema, "d", "", 1)
+    compiler.emit(1, "return errors")
+
+    source = "\n".join(compiler.lines)
+    namespace = {"Mapping": MappingABC, **compiler.constants}
+    exec(compile(source, "<schema>", "exec"), namespace)
+    validate = namespace["validate"]
+    validate.source = source
+    return validate
@@ -0,0 +1,39 @@
+"""Single-file binary snapshots of loaded items, for fast cold starts"""
+from typing import Any, Dict
+
+import logging
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+
+log = logging.getLogger(__name__)
+
+# A snapshot starts with a magic, followed by a single pickle
+_MAGIC = b"RDSNAP01"
+
+
+def write_snapshot(path: Path, snapshot: Dict[str, Any]) -> Path:
+    """Writes a snapshot atomically, so readers never see a partial file"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_MAGIC)
+            pickle.dump(snapshot, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return path
+
+
+def read_snapshot(path: Path) -> Dict[str, Any]:
+    """Reads a snapshot with a single read, raising ValueError if it isn't one"""
+    with Path(path).open("rb") as f:
+        content = f.read()
+    if not content.startswith(_MAGIC):
+        raise ValueError(f"{path} is not a Dicts snapshot")
+    return pickle.loads(memoryview(content)[len(_MAGIC) :])
@@ -0,0 +1,60 @@
+"""Statistics of the files loaded into a Dicts"""
+from typing import List, NamedTuple, Optional
+
+
+class FileStats(NamedTuple):
+    """How loading a single file went"""
+
+    path: str
+    # Time spent reading and parsing the file, in the worker that loaded it.
+    # For a lazy Dicts, it includes the time spent by the consumer between items
+    seconds: float
+    bytes: int
+    documents: int
+    # Documents dropped by Dicts.remove_disabled_items
+    disabled: int = 0
+    error: Optional[str] = None
+    cache_hit: bool = False
+
+
+class LoadStats:
+    """
+    The stats of every file loaded into a Dicts, in load order, and the wall
+    time of the load. For a lazy Dicts, the wall time includes the time spent
+    by the consumer between items.
+    """
+
+    def __init__(self):
+        self.files: List[FileStats] = []
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return (
+            f"LoadStats(files={len(self.files)}, documents={self.documents}, "
+            f"disabled={self.disabled}, errors={len(self.errors)}, "
+            f"cache_hits={self.cache_hits}, seconds={self.seconds:.3f})"
+        )
+
+    @property
+    def bytes(self) -> int:
+        return sum(f.bytes for f in self.files)
+
+    @property
+    def documents(self) -> int:
+        return sum(f.documents for f in self.files)
+
+    @property
+    def disabled(self) -> int:
+        return sum(f.disabled for f in self.files)
+
+    @property
+    def errors(self) -> List[FileStats]:
+        return [f for f in self.files if f.error is not None]
+
+    @property
+    def cache_hits(self) -> int:
+        return sum(1 for f in self.files if f.cache_hit)
+
+    def slowest(self, n: int = 10) -> List[FileStats]:
+        """The n files which took longest to load"""
+        return sorted(self.files, key=lambda f: f.seconds, reverse=True)[:n]
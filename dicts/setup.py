@@ -7,8 +7,9 @@ setup(
     author_email="demeter.sztanko@revolut.com",
     description="An API for manipulating lists of dictionaries.",
     url="https://github.com/revolut-engineering/data-libs/tree/master/dicts",
-    py_modules=["revlibs.dicts"],
+    packages=find_packages(),
     python_requires=">=3.6",
     install_requires=["ruamel.yaml>=0.15.89"],
+    extras_require={"columns": ["numpy"]},
     namespace_packages=["revlibs"],
 )
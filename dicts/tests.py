@@ -1,9 +1,22 @@
 from pathlib import Path
+import operator
+import os
+import pickle
+import shutil
 import tempfile
+import threading
+import time
+import tracemalloc
 import json
 import pytest
 from ruamel.yaml import YAML
-from revlibs.dicts import PATH_KEY, DEFAULT_PATH_KEY, Dicts
+from ruamel.yaml.comments import CommentedMap
+from unittest.mock import patch
+import revlibs.dicts.dicts as dicts_module
+from revlibs.dicts import PATH_KEY, DEFAULT_PATH_KEY, Dicts, ItemError, ParseCache, Record
+from revlibs.dicts import ValidationError, compile_schema
+from revlibs.dicts import set_default_parser
+from revlibs.dicts.jsonl import JsonLines
 
 yaml = YAML()
 
@@ -22,9 +35,9 @@ class Animal:
         return False
 
 
-def create_dir(num_files, dict_generator, extensions):
-    tmp_dir = tempfile.mkdtemp()
-    p = Path(tmp_dir)
+def create_dir(num_files, dict_generator, extensions, directory=None):
+    p = Path(directory or tempfile.mkdtemp())
+    p.mkdir(exist_ok=True)
     for i in range(0, num_files):
         d = dict_generator(i)
         # last one should cause problems
@@ -90,6 +103,122 @@ def test_load_dicts(generator, num_files, expected_size, extensions):
     tmp_dir.rmdir()
 
 
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_load_dicts_parallel(executor):
+    tmp_dir = create_dir(
+        20, lambda i: [{"a": i}, {"a": i}], [("yaml", yaml.dump), ("json", yaml.dump)]
+    )
+    expected = list(Dicts.from_path(tmp_dir, skip_errors=True).items)
+    loader = Dicts.from_path(tmp_dir, skip_errors=True, workers=4, executor=executor)
+    dicts = list(loader.items)
+    assert dicts == expected, "parallel loading keeps the order of serial loading"
+    assert len(dicts) == 2 * 20
+    assert all(Path(d[PATH_KEY]).suffix == ".yaml" for d in dicts)
+    with pytest.raises(Exception):
+        list(Dicts.from_path(tmp_dir, workers=4, executor=executor).items)
+    for f in tmp_dir.iterdir():
+        f.unlink()
+    tmp_dir.rmdir()
+
+
+def test_parse_cache(tmp_path):
+    cache = ParseCache(tmp_path / "cache")
+    extensions = [("yaml", yaml.dump), ("json", json.dump)]
+    tmp_dir = create_dir(3, lambda i: {"a": i}, extensions, tmp_path / "files")
+
+    cold = list(Dicts.from_path(tmp_dir, cache=cache).items)
+    with patch("revlibs.dicts.dicts._parse", side_effect=AssertionError("parsed")):
+        warm = list(Dicts.from_path(tmp_dir, cache=cache).items)
+    assert warm == cold, "warm start is served from the cache"
+
+    changed = tmp_dir / "file_0.json"
+    with open(changed, "w") as f:
+        json.dump({"a": 10}, f)
+    loaded = Dicts.from_path(tmp_dir, cache=cache).map_by(PATH_KEY, "_")
+    assert loaded[changed.resolve().as_posix()]["a"] == 10, "changed files are parsed again"
+
+    loader = Dicts.from_path(tmp_dir, cache=cache)
+    loader.invalidate_cache()
+    assert not list(cache.directory.glob("*.pickle"))
+
+
+def test_parse_cache_eviction(tmp_path):
+    tmp_dir = create_dir(10, lambda i: {"a": "x" * 1000}, [("json", json.dump)], tmp_path / "f")
+    cache = ParseCache(tmp_path / "cache", max_bytes=5000)
+    Dicts.from_path(tmp_dir, cache=cache)
+    entries = list(cache.directory.glob("*.pickle"))
+    assert 0 < len(entries) < 10
+    assert sum(e.stat().st_size for e in entries) <= 5000
+
+
+@pytest.mark.parametrize(
+    "parser,expected_type",
+    [
+        pytest.param("rt", CommentedMap, id="Round trip keeps comments"),
+        pytest.param("safe", dict, id="Safe loads plain dicts"),
+        pytest.param("fast", dict, id="Fast loads plain dicts"),
+    ],
+)
+def test_parsers(parser, expected_type, tmp_path):
+    tmp_dir = create_dir(3, lambda i: [{"a": i}, {"a": i}], [("yaml", yaml.dump_all)], tmp_path)
+    dicts = list(Dicts.from_path(tmp_dir, parser=parser).items)
+    assert len(dicts) == 2 * 3
+    assert all(type(d) is expected_type for d in dicts)
+    assert sorted(d["a"] for d in dicts) == [0, 0, 1, 1, 2, 2]
+
+
+def test_fast_parser_fallback(tmp_path):
+    tmp_dir = create_dir(1, lambda i: {"a": i}, [("yaml", yaml.dump)], tmp_path / "f")
+    with patch("revlibs.dicts.parsers.CParser", None), patch.dict(
+        "sys.modules", {"yaml": None}
+    ), patch("revlibs.dicts.parsers._thread_local", threading.local()):
+        set_default_parser("fast")
+        try:
+            dicts = list(Dicts.from_path(tmp_dir).items)
+        finally:
+            set_default_parser("rt")
+    assert dicts == [{"a": 0, PATH_KEY: (tmp_dir / "file_0.yaml").resolve().as_posix()}]
+    with pytest.raises(ValueError):
+        Dicts.from_path(tmp_dir, parser="unknown")
+
+
+def test_stream(tmp_path):
+    tmp_dir = create_dir(5, lambda i: [{"a": i}, {"a": i}], [("yaml", yaml.dump)], tmp_path)
+    loader = Dicts.stream(tmp_dir).filter(lambda d: d["a"] != 2).items_as(Animal)
+    with patch("revlibs.dicts.dicts._parse", wraps=dicts_module._parse) as parse:
+        batches = loader.iter_batches(3)
+        assert parse.call_count == 0, "nothing is parsed before iterating"
+        first = next(batches)
+        assert len(first) == 3
+        assert parse.call_count < 5, "files are parsed as they are needed"
+        rest = list(batches)
+    assert [len(b) for b in rest] == [3, 2]
+    assert all(isinstance(a, Animal) for a in first)
+
+
+def test_stream_interleaved(tmp_path):
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        for i in range(3):
+            (tmp_path / name / f"{i}.yaml").write_text(f"name: {name}{i}\n---\nname: {name}{i}\n")
+    other = tmp_path / "b" / "0.yaml"
+
+    pairs = list(zip(Dicts.stream(tmp_path / "a"), Dicts.stream(tmp_path / "b")))
+    assert [(a["name"], b["name"]) for a, b in pairs] == [
+        (f"a{i}", f"b{i}") for i in range(3) for _ in range(2)
+    ], "interleaved streams don't share a parser's state"
+
+    nested = Dicts.stream(tmp_path / "a").items_as(lambda d: Dicts.from_path(other).items)
+    assert [[d["name"] for d in items] for items in nested] == [["b0", "b0"]] * 6
+
+
+def test_stream_generator():
+    data = ({"a": i, "disabled": i % 2 == 0} for i in range(10))
+    loader = Dicts.from_dicts(data, lazy=True)
+    assert [d["a"] for d in loader] == [1, 3, 5, 7, 9]
+    assert list(loader) == [], "lazy items can only be iterated once"
+
+
 def test_to_dict_simple():
     a = [{"a": 1, PATH_KEY: "x"}]
     loader = Dicts.from_dicts(a)
@@ -170,3 +299,455 @@ def test_group_by_file():
         "y": [{"name": 1, PATH_KEY: "y"}, {"name": 2, PATH_KEY: "y"}],
         DEFAULT_PATH_KEY: [{"name": 2}],
     }
+
+
+def test_key_by_composite_and_unsortable_keys():
+    a = [
+        {"animal": "cat", "size": 1},
+        {"animal": "dog"},
+        {"animal": "cat", "size": 1},
+        {"size": 2},
+    ]
+    out = Dicts.from_dicts(a).key_by(("animal", "size"), default=None)
+    assert list(out) == [("cat", 1), ("dog", None), (None, 2)], "insertion order is kept"
+    assert len(out[("cat", 1)]) == 2
+
+    out = Dicts.from_dicts(a).key_by("size", default="_", sort_keys=False)
+    assert list(out) == [1, "_", 2]
+
+    with pytest.raises(ValueError):
+        Dicts.from_dicts(a).key_by("animal", default="_", map=True)
+
+
+def test_reduce_by():
+    a = [{"diet": "meat", "size": 10}, {"diet": "grass", "size": 5}, {"diet": "meat", "size": 1}]
+    loader = Dicts.from_dicts(iter(a), lazy=True)
+    out = loader.reduce_by("diet", "_", lambda total, d: total + d["size"], 0)
+    assert out == {"meat": 11, "grass": 5}
+
+
+def test_index():
+    a = [
+        {"name": "cat", "diet": "meat", "size": 4},
+        {"name": "cow", "diet": "grass", "size": 600},
+        {"name": "dog", "diet": "meat", "size": 30},
+    ]
+    loader = Dicts.from_dicts(a).index("name").index("diet", "size")
+    assert loader.get_by("name", "cow") == a[1]
+    assert loader.where(diet="meat", size=30) == [a[2]]
+    assert loader.where(diet="meat") == [a[0], a[2]], "lookups without an index scan"
+    with pytest.raises(KeyError):
+        loader.get_by("name", "rat")
+
+    loader.filter(lambda d: d["size"] < 100)
+    assert loader.where(name="cow") == [], "indexes are dropped when the items change"
+    assert loader.index("name").get_by("name", "dog") == a[2]
+    with pytest.raises(ValueError):
+        loader.get_by("diet", "meat")
+
+
+def test_load_recursive(tmp_path):
+    for directory in ("a", "a/b", "drafts"):
+        (tmp_path / directory).mkdir()
+    files = ("top.yaml", "a/one.json", "a/b/two.yml", "a/b/skip.bak.yaml", "drafts/three.yaml")
+    for name in files:
+        (tmp_path / name).write_text(json.dumps({"name": name}))
+    (tmp_path / "a" / "notes.txt").write_text("not a config")
+    (tmp_path / "a" / "loop").symlink_to(tmp_path / "a")
+
+    def names(**kwargs):
+        return [d["name"] for d in Dicts.from_path(tmp_path, **kwargs).items]
+
+    assert names() == ["top.yaml"]
+    with patch("revlibs.dicts.dicts._parse", wraps=dicts_module._parse) as parse:
+        assert names(recursive=True) == [
+            "a/b/skip.bak.yaml",
+            "a/b/two.yml",
+            "a/one.json",
+            "drafts/three.yaml",
+            "top.yaml",
+        ]
+        assert parse.call_count == 5, "unloadable files are never opened"
+    assert names(recursive=True, exclude=["drafts", "*.bak.*"]) == [
+        "a/b/two.yml",
+        "a/one.json",
+        "top.yaml",
+    ]
+    assert names(recursive=True, include="a/*") == [
+        "a/b/skip.bak.yaml",
+        "a/b/two.yml",
+        "a/one.json",
+    ]
+
+
+def test_refresh(tmp_path):
+    for i in range(3):
+        (tmp_path / f"{i}.json").write_text(json.dumps([{"name": f"a{i}"}, {"name": f"b{i}"}]))
+    calls = []
+
+    def is_a(d):
+        calls.append(d)
+        return d["name"].startswith("a")
+
+    loader = Dicts.from_path(tmp_path).filter(is_a).index("name")
+    assert [d["name"] for d in loader.items] == ["a0", "a1", "a2"]
+    calls.clear()
+    assert not loader.refresh(), "nothing changed"
+    assert not calls, "the pipeline isn't replayed when nothing changed"
+
+    def path(name):
+        return (tmp_path / name).resolve().as_posix()
+
+    (tmp_path / "1.json").write_text(json.dumps([{"name": "a1", "size": 1}]))
+    (tmp_path / "2.json").unlink()
+    (tmp_path / "3.json").write_text(json.dumps({"name": "a3"}))
+    with patch("revlibs.dicts.dicts._load_path", wraps=dicts_module._load_path) as load:
+        diff = loader.refresh()
+        assert load.call_count == 2, "only changed files are parsed"
+
+    assert diff.added == {path("3.json"): [{"name": "a3", PATH_KEY: path("3.json")}]}
+    assert list(diff.removed) == [path("2.json")]
+    assert diff.modified == {path("1.json"): [{"name": "a1", "size": 1, PATH_KEY: path("1.json")}]}
+    assert [d["name"] for d in loader.items] == ["a0", "a1", "a3"], "the pipeline is replayed"
+    assert loader.get_by("name", "a1")["size"] == 1, "indexes are rebuilt"
+
+
+def test_refresh_compact(tmp_path):
+    for i in range(4):
+        (tmp_path / f"{i}.json").write_text(json.dumps({"name": f"a{i}"}))
+    loader = Dicts.from_path(tmp_path, compact=True)
+    restored = Dicts.load_snapshot(loader.save_snapshot(tmp_path / "snapshot" / "s"))
+    for i in (1, 3):
+        (tmp_path / f"{i}.json").write_text(json.dumps({"name": f"b{i}"}))
+
+    for refreshed in (loader, restored):
+        assert refreshed.refresh()
+        assert [type(d).__name__ for d in refreshed.items] == ["Record"] * 4
+        assert [d["name"] for d in refreshed.items] == ["a0", "b1", "a2", "b3"]
+
+
+def test_watch(tmp_path):
+    (tmp_path / "0.json").write_text(json.dumps({"name": "a"}))
+    loader = Dicts.from_path(tmp_path)
+    diffs = []
+    changed = threading.Event()
+
+    def on_change(diff):
+        diffs.append(diff)
+        changed.set()
+
+    watcher = loader.watch(interval=0.01, callback=on_change)
+    try:
+        (tmp_path / "1.json").write_text(json.dumps({"name": "b"}))
+        assert changed.wait(5)
+    finally:
+        watcher.stop()
+    assert len(diffs) == 1
+    assert [d["name"] for d in loader.items] == ["a", "b"]
+    with pytest.raises(ValueError):
+        Dicts.stream(tmp_path).refresh()
+
+
+def test_json_lines(tmp_path):
+    path = tmp_path / "export.jsonl"
+    records = [{"a": i, "disabled": i % 10 == 0} for i in range(100)]
+    path.write_text("\n".join(json.dumps(r) for r in records) + "\n\n")
+    full_path = path.resolve().as_posix()
+
+    loaded = list(Dicts.from_path(path).items)
+    assert [d["a"] for d in loaded] == [i for i in range(100) if i % 10]
+    assert all(d[PATH_KEY] == full_path for d in loaded)
+
+    parallel = Dicts.from_path(path, workers=3, executor="process").items
+    assert parallel == loaded, "byte ranges split the records exactly"
+
+    lines = JsonLines(path)
+    assert len(lines) == 100
+    assert lines[5] == records[5]
+    lines.save_index()
+    assert JsonLines(path).load_index() == lines.index()
+
+    lazy = Dicts.stream(path, load_disabled=True)
+    with patch.object(JsonLines, "__iter__", side_effect=AssertionError("parsed")):
+        assert lazy[3]["a"] == 3
+        assert [d["a"] for d in lazy[8:12]] == [8, 9, 10, 11]
+        assert lazy[-1][PATH_KEY] == full_path
+    assert Dicts.stream(path)[0:4] == loaded[0:4], "positions agree with iteration"
+    assert isinstance(Dicts.stream(path, compact=True)[0], Record)
+
+    path.write_text(json.dumps({"a": 0}))
+    assert JsonLines(path).load_index() is None, "stale indexes are not used"
+
+
+def test_compact_records(tmp_path):
+    path = tmp_path / "export.jsonl"
+    path.write_text("\n".join(json.dumps({"a": i, "b": {"c": i}}) for i in range(1000)))
+
+    records = Dicts.from_path(path, compact=True).items
+    dicts = Dicts.from_path(path).items
+    assert records == dicts, "records compare equal to dicts"
+    assert all(isinstance(r, Record) for r in records)
+    assert records[1].get("a") == 1 and records[1].get("x", "_") == "_"
+    assert records[1]["b"]["c"] == 1
+    assert records[1].to_dict() == dicts[1]
+    assert records[0]._schema is records[999]._schema
+    assert records[0][PATH_KEY] is records[999][PATH_KEY]
+    assert pickle.loads(pickle.dumps(records)) == records
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    rows = ({"a": i % 100, "b": "b", "c": None} for i in range(10000))
+    compact = list(Dicts.from_dicts(rows).items_as_records().items)
+    record_bytes = tracemalloc.take_snapshot().compare_to(before, "filename")
+    plain = [{"a": i % 100, "b": "b", "c": None} for i in range(10000)]
+    dict_bytes = tracemalloc.take_snapshot().compare_to(before, "filename")
+    tracemalloc.stop()
+    used = sum(s.size_diff for s in record_bytes)
+    assert used * 2 < sum(s.size_diff for s in dict_bytes) - used, "records use less memory"
+    assert len(compact) == len(plain)
+
+
+@pytest.mark.parametrize("numpy", [True, False], ids=["NumPy", "stdlib"])
+def test_columns(numpy):
+    from revlibs.dicts import columns
+    from revlibs.dicts.columns import col
+
+    data = [
+        {"animal": "cat", "size": 4, "speed": 48.0},
+        {"animal": "cow", "size": 600, "speed": 40},
+        {"animal": "dog", "size": 30},
+        {"animal": "rat", "size": 1, "speed": 13.5},
+    ]
+    with patch.object(columns, "np", columns.np if numpy else None):
+        table = Dicts.from_dicts(data).to_columns()
+        assert len(table) == 4 and table.names == ["animal", "size", "speed"]
+        assert list(table["size"]) == [4, 600, 30, 1]
+
+        small = table.filter((col("size") < 100) & ~(col("animal") == "rat"))
+        assert [row["animal"] for row in small.to_dicts()] == ["cat", "dog"]
+        assert list(table.filter(col("speed") > 20).to_dicts()) == [
+            {"animal": "cat", "size": 4, "speed": 48.0},
+            {"animal": "cow", "size": 600, "speed": 40},
+        ]
+        assert len(table.filter(col("speed").is_null() | col("animal").isin(["rat"]))) == 2
+        for values in ([4, "x"], [30.0, None, "cat"], ["x"], [1.5, True]):
+            isin = col("size").isin(values)
+            assert list(isin.evaluate(table)) == [isin(row) for row in data], "mixed values"
+
+        assert table.aggregate("size", "sum") == 635
+        assert table.aggregate("size", "max") == 600
+        assert table.aggregate("speed", "count") == 3
+        by_size = table.group_by("size")
+        assert list(by_size[30].to_dicts()) == [{"animal": "dog", "size": 30, "speed": None}]
+
+    assert Dicts.from_dicts(data).filter(col("speed") >= 40).map_by("animal", "_").keys() == {
+        "cat",
+        "cow",
+    }, "expressions filter rows too"
+
+
+def test_join():
+    jobs = [
+        {"job": "a", "connection": "pg"},
+        {"job": "b", "connection": "exa"},
+        {"job": "c", "connection": "missing"},
+        {"job": "d"},
+    ]
+    connections = [{"name": "pg", "flavour": "postgres"}, {"name": "exa", "flavour": "exasol"}]
+
+    def join(how, lazy=False):
+        loader = Dicts.from_dicts(iter(jobs) if lazy else jobs, lazy=lazy)
+        joined = loader.join(Dicts.from_dicts(connections), "connection", how, other_on="name")
+        return list(joined.items)
+
+    inner = [(jobs[0], connections[0]), (jobs[1], connections[1])]
+    assert join("inner") == inner, "pairs keep their sides when building on the smaller one"
+    assert join("inner", lazy=True) == inner
+    assert join("left") == inner + [(jobs[2], None), (jobs[3], None)]
+    assert join("anti") == [jobs[2], jobs[3]]
+
+    composite = Dicts.from_dicts(jobs).join(jobs, ("job", "connection"))
+    assert [l["job"] for l, r in composite.items] == ["a", "b", "c"], "None keys don't match"
+    by_function = Dicts.from_dicts(connections).join(
+        jobs, lambda d: d.get("name"), other_on="connection"
+    )
+    assert len(list(by_function.items)) == 2
+    with pytest.raises(ValueError):
+        Dicts.from_dicts(jobs).join(jobs, "job", how="outer")
+
+
+def test_snapshot(tmp_path):
+    directory = tmp_path / "configs"
+    directory.mkdir()
+    for i in range(3):
+        (directory / f"{i}.json").write_text(json.dumps([{"name": f"a{i}"}, {"name": f"b{i}"}]))
+    (directory / "3.json").write_text(json.dumps({"name": "c", "disabled": True}))
+    loaded = Dicts.from_path(directory)
+    snapshot = loaded.save_snapshot(tmp_path / "configs.snapshot")
+
+    restored = Dicts.load_snapshot(snapshot, verify=True)
+    assert restored.items == loaded.items
+    assert restored.path == loaded.path
+    assert not restored.refresh(), "restored files are up to date"
+
+    shutil.copytree(directory, tmp_path / "copy")
+    shutil.rmtree(directory)
+    (tmp_path / "copy").rename(directory)
+    os.utime(directory / "0.json", ns=(0, 0))
+    with patch("revlibs.dicts.dicts._parse", side_effect=AssertionError("parsed")):
+        copied = Dicts.load_snapshot(snapshot, verify=True)
+        assert copied.items == loaded.items, "copies of the files match the snapshot"
+        assert not copied.refresh()
+
+    (directory / "4.json").write_text(json.dumps({"name": "d"}))
+    stale = Dicts.load_snapshot(snapshot, verify=True)
+    assert [d["name"] for d in stale.items][-1] == "d", "stale snapshots are reloaded"
+    assert Dicts.load_snapshot(snapshot).items == loaded.items, "unverified loads trust it"
+
+    mapped = Dicts.from_dicts([{"a": 1}]).items_as(lambda d: d["a"])
+    assert Dicts.load_snapshot(mapped.save_snapshot(tmp_path / "mapped")).items == [1]
+
+    names = Dicts.from_path(directory).items_as(operator.itemgetter("name"))
+    names_snapshot = names.save_snapshot(tmp_path / "names")
+    assert Dicts.load_snapshot(names_snapshot, verify=True).items == names.items
+    (directory / "5.json").write_text(json.dumps({"name": "e"}))
+    with pytest.raises(ValueError, match="transformed items is stale"):
+        Dicts.load_snapshot(names_snapshot, verify=True)
+    with pytest.raises(ValueError):
+        Dicts.load_snapshot(directory / "0.json")
+
+
+def _size(item):
+    return item["size"] * 2
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_items_as_parallel(executor):
+    items = [{"size": i, PATH_KEY: f"{i}.yaml"} for i in range(100)]
+    loader = Dicts.from_dicts([{"weight": 1}] + items, lazy=True).filter(
+        operator.methodcaller("__contains__", "size"), workers=4, executor=executor
+    )
+    sizes = loader.items_as(_size, workers=4, chunksize=7, executor=executor)
+    assert list(sizes) == [i * 2 for i in range(100)], "results keep the order of the items"
+
+    items.insert(42, {"weight": 1, PATH_KEY: "bad.yaml"})
+    broken = Dicts.from_dicts(items).items_as(_size, workers=2, chunksize=5, executor=executor)
+    with pytest.raises(ItemError, match="bad.yaml: KeyError"):
+        list(broken)
+
+
+def test_load_stats(tmp_path, caplog):
+    (tmp_path / "a.json").write_text(json.dumps([{"name": "a"}, {"name": "b", "disabled": True}]))
+    (tmp_path / "b.yaml").write_text("name: c\n---\nname: d\n")
+    (tmp_path / "c.json").write_text("{")
+    hooked = []
+    cache = ParseCache(tmp_path / "cache")
+
+    def load():
+        return Dicts.from_path(tmp_path, skip_errors=True, cache=cache, stats_hook=hooked.append)
+
+    with caplog.at_level("INFO"):
+        stats = load().load_stats
+    assert "1 out of 4 items are disabled" in caplog.text
+
+    assert [(f.documents, f.disabled, f.cache_hit) for f in stats.files] == [
+        (2, 1, False),
+        (2, 0, False),
+        (0, 0, False),
+    ]
+    assert stats.bytes == sum(p.stat().st_size for p in tmp_path.glob("*.*"))
+    assert [f.path for f in stats.errors] == [(tmp_path / "c.json").resolve().as_posix()]
+    assert stats.errors[0].error.startswith("JSONDecodeError")
+    assert stats.seconds >= max(f.seconds for f in stats.files)
+    assert hooked == [stats]
+
+    assert load().load_stats.cache_hits == 2
+
+    streamed = Dicts.stream(tmp_path / "a.json", stats_hook=hooked.append)
+    assert [d["name"] for d in streamed] == ["a"]
+    assert [(f.documents, f.disabled) for f in streamed.load_stats.files] == [(2, 1)]
+    assert hooked[-1] is streamed.load_stats, "lazy loads report their stats"
+
+
+SCHEMA = {
+    "name": {"type": "str", "required": True},
+    "size": {"type": int, "default": 0},
+    "diet": {"enum": ["meat", "grass"]},
+    "location": {"schema": {"lat": "float", "tags": {"items": {"enum": ["a", "b"]}}}},
+    "friends": {"type": "list", "default": []},
+}
+
+
+def test_compile_schema():
+    validate = compile_schema(SCHEMA)
+    animal = {"name": "Zebra", "diet": "grass", "location": {"lat": 1, "tags": ["a"]}}
+    assert validate(animal) == []
+    assert animal["size"] == 0 and animal["friends"] == [], "defaults are set"
+    lion, cat = {"name": "Lion"}, {"name": "Cat"}
+    validate(lion), validate(cat)
+    assert lion["friends"] is not cat["friends"], "mutable defaults are copied"
+
+    errors = validate(
+        {"size": True, "diet": "fish", "location": {"lat": "north", "tags": ["a", "c"]}}
+    )
+    assert errors == [
+        "name: missing required key",
+        "size: expected int, got bool",
+        "diet: 'fish' is not one of ['meat', 'grass']",
+        "location.lat: expected float, got str",
+        "location.tags[1]: 'c' is not one of ['a', 'b']",
+    ]
+    assert validate([]) == ["expected a mapping, got list"]
+    with pytest.raises(ValueError):
+        compile_schema({"name": {"type": "text"}})
+    with pytest.raises(ValueError):
+        compile_schema({"name": {"requires": True}})
+
+
+def test_validate():
+    items = [{"name": "a", PATH_KEY: "a.yaml"}, {"size": 1, PATH_KEY: "b.yaml"}, {"name": "c"}]
+    with pytest.raises(ValidationError, match="b.yaml: name: missing required key"):
+        list(Dicts.from_dicts(items, lazy=True).validate(SCHEMA).items)
+
+    loader = Dicts.from_dicts(items).validate(SCHEMA, fail_fast=False)
+    assert [d["name"] for d in loader.items] == ["a", "c"]
+    assert [e.path for e in loader.validation_errors] == ["b.yaml"]
+    assert pickle.loads(pickle.dumps(loader.validation_errors[0])).errors == [
+        "name: missing required key"
+    ]
+
+
+def test_parse_cache_variants(tmp_path):
+    cache = ParseCache(tmp_path / "cache")
+    tmp_dir = create_dir(1, lambda i: {"a": i}, [("yaml", yaml.dump)], tmp_path / "f")
+    for parser in ("rt", "safe"):
+        Dicts.from_path(tmp_dir, cache=cache, parser=parser)
+    assert len(list(cache.directory.glob("*.pickle"))) == 2, "parsers keep their own entries"
+
+    with patch("revlibs.dicts.dicts._parse", side_effect=AssertionError("parsed")):
+        for parser in ("rt", "safe"):
+            assert list(Dicts.from_path(tmp_dir, cache=cache, parser=parser).items)
+
+    cache.invalidate(next(tmp_dir.iterdir()))
+    assert not list(cache.directory.glob("*.pickle"))
+
+
+def test_json_lines_ranges_bounded(tmp_path):
+    path = tmp_path / "export.jsonl"
+    path.write_text("\n".join(json.dumps({"a": i}) for i in range(1000)))
+    load_range = dicts_module._load_range
+    loaded = []
+
+    def counting(path, bounds):
+        loaded.append(bounds)
+        return load_range(path, bounds)
+
+    with patch("revlibs.dicts.dicts.JSONL_RANGE_BYTES", 100), patch(
+        "revlibs.dicts.dicts._load_range", counting
+    ):
+        items = iter(Dicts.stream(path, workers=2, executor="thread"))
+        assert next(items)["a"] == 0
+        time.sleep(0.2)
+        assert len(loaded) <= 2 * dicts_module.TASKS_PER_WORKER, "ranges are parsed on demand"
+        assert sum(1 for _ in items) == 999
+    assert len(loaded) > 2 * dicts_module.TASKS_PER_WORKER